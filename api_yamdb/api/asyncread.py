@@ -0,0 +1,86 @@
+"""
+Асинхронное чтение под ASGI.
+
+В Django 3.2 нет асинхронного ORM, а синхронные представления под ASGI
+выполняются по очереди в одном общем потоке. При ASYNC_READ['ENABLED']
+представления AsyncReadMixin становятся асинхронными: GET, HEAD и
+OPTIONS выполняются в отдельном пуле из THREADS потоков, и ответ
+рендерится там же, а запись идет через общий поток, как раньше.
+asgi.py включает режим по умолчанию, под WSGI представления синхронные.
+"""
+import os
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+from functools import lru_cache, update_wrapper
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+from django.http import HttpResponse
+
+from core.middleware import current_profile, profiled_queries
+
+DEFAULTS = {
+    'ENABLED': False,
+    'THREADS': min(8, (os.cpu_count() or 1) + 2),
+}
+READ_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+def async_read_setting(name):
+    return getattr(settings, 'ASYNC_READ', {}).get(name, DEFAULTS[name])
+
+
+@lru_cache(maxsize=None)
+def read_executor():
+    return ThreadPoolExecutor(
+        max_workers=async_read_setting('THREADS'),
+        thread_name_prefix='read'
+    )
+
+
+def rendered(view):
+    """Вызов view с готовым ответом, как у запроса в своем потоке."""
+
+    def read(request, *args, **kwargs):
+        # соединения потоков пула закрываются по CONN_MAX_AGE,
+        # как при сигналах request_started и request_finished
+        close_old_connections()
+        profile = current_profile.get()
+        try:
+            with ExitStack() as stack:
+                # у потока пула свои соединения, их QueryProfileMiddleware
+                # не оборачивает
+                if profile is not None:
+                    stack.enter_context(profiled_queries(profile))
+                response = view(request, *args, **kwargs)
+            if not hasattr(response, 'render'):
+                return response
+            response.render()
+            # HttpResponse не рендерится повторно в общем потоке
+            plain = HttpResponse(
+                response.content,
+                status=response.status_code,
+                headers=dict(response.items())
+            )
+            plain.cookies = response.cookies
+            return plain
+        finally:
+            close_old_connections()
+
+    return read
+
+
+def async_read_view(view):
+    """Асинхронная обертка синхронного представления."""
+    read = sync_to_async(
+        rendered(view), thread_sensitive=False, executor=read_executor()
+    )
+    write = sync_to_async(view, thread_sensitive=True)
+
+    async def async_view(request, *args, **kwargs):
+        if request.method in READ_METHODS:
+            return await read(request, *args, **kwargs)
+        return await write(request, *args, **kwargs)
+
+    return update_wrapper(async_view, view)
@@ -0,0 +1,46 @@
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import (AuthenticationFailed,
+                                                 InvalidToken)
+from rest_framework_simplejwt.settings import api_settings
+
+from .tokens import (STALE, VALID, RoleTokenUser, check_role_claims,
+                     role_claims_setting)
+from users.cache import get_cached_user
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWT аутентификация без запроса к таблице пользователей:
+    пользователь собирается из ролей в токене (api/tokens.py),
+    а для токенов без ролей или с устаревшими ролями берется
+    из кеша облегченных копий (users/cache.py).
+    """
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(
+                _('Token contained no recognizable user identification')
+            )
+        claims = check_role_claims(validated_token)
+        if claims == VALID:
+            return RoleTokenUser(validated_token)
+        if claims == STALE and role_claims_setting(
+            'ON_ROLE_CHANGE'
+        ) == 'revoke':
+            raise AuthenticationFailed(
+                'Роль пользователя изменилась, получите новый токен',
+                code='token_revoked'
+            )
+        user = get_cached_user(user_id)
+        if user is None:
+            raise AuthenticationFailed(
+                _('User not found'), code='user_not_found'
+            )
+        if not user.is_active:
+            raise AuthenticationFailed(
+                _('User is inactive'), code='user_inactive'
+            )
+        return user
@@ -1,5 +1,9 @@
 import django_filters
+from django.conf import settings
+from django.db.models import Case, IntegerField, Q, When
+
 from reviews.models import Title
+from reviews.search import search_titles
 
 
 class TitleFilter(django_filters.FilterSet):
@@ -9,7 +13,25 @@ class TitleFilter(django_filters.FilterSet):
     genre = django_filters.CharFilter(
         field_name='genre__slug'
     )
+    search = django_filters.CharFilter(
+        method='filter_search'
+    )
 
     class Meta:
         model = Title
-        fields = ('category', 'genre', 'name', 'year')
+        fields = ('category', 'genre', 'name', 'year', 'search')
+
+    def filter_search(self, queryset, name, value):
+        """
+        Полнотекстовый поиск по названию и описанию.
+        Результаты упорядочены по релевантности.
+        """
+        ids = search_titles(value, settings.TITLE_SEARCH_LIMIT)
+        if ids is None:
+            return queryset.filter(
+                Q(name__icontains=value) | Q(description__icontains=value)
+            )
+        return queryset.filter(pk__in=ids).order_by(Case(
+            *[When(pk=pk, then=position) for position, pk in enumerate(ids)],
+            output_field=IntegerField()
+        ))
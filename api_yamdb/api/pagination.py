@@ -0,0 +1,159 @@
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from collections import OrderedDict
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Пагинация по ключу: страница выбирается условием
+    (f1, f2, ...) > (v1, v2, ...) по полям сортировки последней записи,
+    без COUNT(*) и OFFSET. Последнее поле сортировки должно быть уникальным.
+    """
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Невалидный курсор.'
+    page_size = api_settings.PAGE_SIZE
+
+    def __init__(self, ordering=('pk',)):
+        self.ordering = tuple(ordering)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.base_url = request.build_absolute_uri()
+        values, reverse = self.decode_cursor(request, queryset.model)
+
+        ordering = self.ordering
+        if reverse:
+            ordering = tuple(f'-{field}' for field in ordering)
+        queryset = queryset.order_by(*ordering)
+        if values is not None:
+            queryset = queryset.filter(self.keyset_filter(values, reverse))
+
+        results = list(queryset[:self.page_size + 1])
+        has_more = len(results) > self.page_size
+        results = results[:self.page_size]
+        if reverse:
+            results.reverse()
+
+        has_next = values is not None if reverse else has_more
+        has_previous = has_more if reverse else values is not None
+        self.next_values = (
+            self.get_values(results[-1]) if has_next and results else None
+        )
+        self.previous_values = (
+            self.get_values(results[0]) if has_previous and results else None
+        )
+        return results
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data)
+        ]))
+
+    def get_next_link(self):
+        if self.next_values is None:
+            return None
+        return self.encode_cursor(self.next_values, reverse=False)
+
+    def get_previous_link(self):
+        if self.previous_values is None:
+            return None
+        return self.encode_cursor(self.previous_values, reverse=True)
+
+    def get_values(self, obj):
+        return [getattr(obj, field) for field in self.ordering]
+
+    def keyset_filter(self, values, reverse):
+        """Строит условие кортежного сравнения через OR префиксов."""
+        lookup = 'lt' if reverse else 'gt'
+        condition = Q()
+        for idx, field in enumerate(self.ordering):
+            prefix = dict(zip(self.ordering[:idx], values[:idx]))
+            condition |= Q(**prefix, **{f'{field}__{lookup}': values[idx]})
+        return condition
+
+    def encode_cursor(self, values, reverse):
+        values = [
+            value.isoformat() if hasattr(value, 'isoformat') else value
+            for value in values
+        ]
+        data = json.dumps({'v': values, 'r': int(reverse)})
+        token = urlsafe_b64encode(data.encode()).decode()
+        return replace_query_param(
+            self.base_url, self.cursor_query_param, token
+        )
+
+    def decode_cursor(self, request, model):
+        """
+        Значения и направление из курсора. Значения приводятся к типам
+        полей сортировки, подделанный курсор дает 404, а не ошибку.
+        """
+        token = request.query_params.get(self.cursor_query_param)
+        if not token:
+            return None, False
+        try:
+            data = json.loads(urlsafe_b64decode(token.encode()).decode())
+            values, reverse = data['v'], bool(data['r'])
+            if (not isinstance(values, list)
+                    or len(values) != len(self.ordering)):
+                raise ValueError
+            values = [
+                self.cursor_value(model, field, value)
+                for field, value in zip(self.ordering, values)
+            ]
+        except (TypeError, ValueError, KeyError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+        return values, reverse
+
+    def cursor_value(self, model, field, value):
+        if isinstance(value, bool) or not isinstance(value, (str, int, float)):
+            raise ValueError
+        if field == 'pk':
+            field = model._meta.pk.name
+        return model._meta.get_field(field).to_python(value)
+
+
+class PageNumberOrKeysetPagination(PageNumberPagination):
+    """
+    Постраничная пагинация по умолчанию.
+    С параметром ?pagination=cursor (или при наличии ?cursor=)
+    выдача переключается на KeysetPagination по keyset_ordering.
+    """
+    keyset_ordering = ('pk',)
+    mode_query_param = 'pagination'
+    keyset_mode = 'cursor'
+
+    def keyset_requested(self, request):
+        return (
+            request.query_params.get(self.mode_query_param)
+            == self.keyset_mode
+            or KeysetPagination.cursor_query_param in request.query_params
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = None
+        if self.keyset_requested(request):
+            self.keyset = KeysetPagination(self.keyset_ordering)
+            return self.keyset.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.keyset is not None:
+            return self.keyset.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+
+class TitlePagination(PageNumberOrKeysetPagination):
+    keyset_ordering = ('name', 'id')
+
+
+class PubDatePagination(PageNumberOrKeysetPagination):
+    keyset_ordering = ('pub_date', 'id')
@@ -1,5 +1,7 @@
 import re
 
+from django.db import IntegrityError, transaction
+from django.db.models import Q
 from rest_framework import serializers
 from rest_framework.validators import UniqueValidator
 
@@ -30,23 +32,45 @@ class UserCreateSerializer(Validatemixin, serializers.Serializer):
     username = serializers.CharField(max_length=FIELD_LENGTH['NAME'])
     email = serializers.EmailField(max_length=FIELD_LENGTH['EMAIL'])
 
-    def validate(self, data):
-        user_by_name = User.objects.filter(
-            username=data.get('username')).first()
-        user_by_email = User.objects.filter(email=data.get('email')).first()
-        if user_by_name != user_by_email:
-            if user_by_name:
-                raise serializers.ValidationError(
-                    'Пользователь с таким username уже существует'
-                )
+    def find_user(self, data):
+        """
+        Одним запросом находит пользователя для повторной регистрации
+        или сообщает, какое из полей уже занято.
+        """
+        users = list(User.objects.filter(
+            Q(username=data.get('username')) | Q(email=data.get('email'))
+        ).order_by()[:2])
+        for user in users:
+            if (user.username, user.email) == (data.get('username'),
+                                               data.get('email')):
+                return user
+        if not users:
+            return None
+        if any(user.username == data.get('username') for user in users):
             raise serializers.ValidationError(
-                'Пользователь с таким email уже существует'
+                'Пользователь с таким username уже существует'
             )
+        raise serializers.ValidationError(
+            'Пользователь с таким email уже существует'
+        )
+
+    def validate(self, data):
+        self.user = self.find_user(data)
         return data
 
     def create(self, validated_data):
-        user, _ = User.objects.get_or_create(**validated_data)
-        return user
+        if self.user is not None:
+            return self.user
+        try:
+            with transaction.atomic():
+                return User.objects.create(**validated_data)
+        except IntegrityError:
+            # параллельная регистрация заняла username или email,
+            # уникальные ограничения БД разрешают гонку
+            user = self.find_user(validated_data)
+            if user is None:
+                raise
+            return user
 
 
 class UserTokenReceiveSerializer(Validatemixin, serializers.Serializer):
@@ -136,7 +160,7 @@ class ReviewSerializer(serializers.ModelSerializer):
 
     def validate(self, value):
         if self.context['request'].method == 'POST':
-            author = self.context['request'].user
+            author = self.context['request'].user.pk
             title_id = (self.context['request'].
                         parser_context['kwargs'].get('title_id'))
             if Review.objects.filter(title=title_id, author=author).exists():
@@ -146,6 +170,26 @@ class ReviewSerializer(serializers.ModelSerializer):
         return value
 
 
+class CommentBulkSerializer(CommentSerializer):
+    """Комментарий пакетной загрузки, автор задается по имени."""
+    author = serializers.CharField(
+        max_length=FIELD_LENGTH['NAME'],
+        required=False
+    )
+
+
+class ReviewBulkSerializer(ReviewSerializer):
+    """Отзыв пакетной загрузки, автор задается по имени."""
+    author = serializers.CharField(
+        max_length=FIELD_LENGTH['NAME'],
+        required=False
+    )
+
+    def validate(self, value):
+        # уникальность проверяется для всей пачки одним запросом
+        return value
+
+
 class TitleCreateSerializer(serializers.ModelSerializer):
     name = serializers.CharField(
         min_length=1,
@@ -180,15 +224,26 @@ class TitleCreateSerializer(serializers.ModelSerializer):
         return data
 
     def to_representation(self, instance):
-        return TitleSerializer(instance).data
+        return TitleSerializer(instance, context=self.context).data
 
 
 class TitleSerializer(serializers.ModelSerializer):
+    """
+    Поля из optional_fields выводятся только по запросу:
+    ?include=review_count,score_histogram.
+    """
     genre = GenreSerializer(
         many=True,
     )
     category = CategorySerializer()
     rating = serializers.IntegerField(read_only=True)
+    review_count = serializers.IntegerField(
+        source='rating_count', read_only=True
+    )
+    score_histogram = serializers.DictField(
+        child=serializers.IntegerField(), read_only=True
+    )
+    optional_fields = ('review_count', 'score_histogram')
 
     class Meta:
         model = Title
@@ -199,5 +254,16 @@ class TitleSerializer(serializers.ModelSerializer):
             'rating',
             'description',
             'genre',
-            'category'
+            'category',
+            'review_count',
+            'score_histogram'
         )
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self.context.get('request')
+        include = set(
+            request.query_params.get('include', '').split(',')
+        ) if request else set()
+        for name in set(self.optional_fields) - include:
+            self.fields.pop(name)
@@ -0,0 +1,71 @@
+import time
+from hashlib import md5
+
+from django.core.cache import cache
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """
+    Ограничение частоты запросов по алгоритму token bucket.
+    Скорость задается в DEFAULT_THROTTLE_RATES как 'N/период':
+    в корзине не больше N жетонов, за период восстанавливается N.
+    Состояние корзин хранится в кеше Django, проверка не обращается к БД.
+    """
+    scope = None
+    cache = cache
+    timer = time.time
+    durations = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+    def __init__(self):
+        rate = api_settings.DEFAULT_THROTTLE_RATES[self.scope]
+        num, period = rate.split('/')
+        self.capacity = int(num)
+        self.period = self.durations[period[0]]
+        self.refill_rate = self.capacity / self.period
+
+    def get_cache_key(self, request, view):
+        """Ключ корзины или None, если запрос не ограничивается."""
+        raise NotImplementedError
+
+    def allow_request(self, request, view):
+        key = self.get_cache_key(request, view)
+        if key is None:
+            return True
+        key = f'throttle:{self.scope}:{key}'
+        now = self.timer()
+        tokens, updated = self.cache.get(key, (self.capacity, now))
+        tokens = min(
+            self.capacity, tokens + (now - updated) * self.refill_rate
+        )
+        self.tokens = tokens
+        if tokens < 1:
+            return False
+        self.cache.set(key, (tokens - 1, now), self.period)
+        return True
+
+    def wait(self):
+        return (1 - self.tokens) / self.refill_rate
+
+
+class ConfirmationCodeIPThrottle(TokenBucketThrottle):
+    """
+    Попытки получить токен с одного IP: REMOTE_ADDR или адрес
+    из X-Forwarded-For за NUM_PROXIES доверенными прокси.
+    """
+    scope = 'confirmation_ip'
+
+    def get_cache_key(self, request, view):
+        return self.get_ident(request)
+
+
+class ConfirmationCodeUsernameThrottle(TokenBucketThrottle):
+    """Попытки получить токен для одного пользователя."""
+    scope = 'confirmation_username'
+
+    def get_cache_key(self, request, view):
+        username = request.data.get('username')
+        if not isinstance(username, str) or not username:
+            return None
+        return md5(username.lower().encode()).hexdigest()
@@ -0,0 +1,71 @@
+"""
+Access токены с ролью пользователя.
+
+Токен хранит роль и флаги is_staff/is_superuser, поэтому права
+проверяются без обращения к БД. При смене роли, флагов, is_active
+и удалении пользователя версия ролей в кеше меняется (users/signals.py),
+и выданные раньше токены по настройке
+settings.TOKEN_ROLE_CLAIMS['ON_ROLE_CHANGE'] либо берут права из БД
+('reload'), либо отклоняются ('revoke').
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.functional import cached_property
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from core.cache import get_version, version_key
+from users.enums import UserRoles
+from users.models import User
+
+DEFAULTS = {
+    'ENABLED': True,
+    'ON_ROLE_CHANGE': 'reload',
+}
+VERSION_CLAIM = 'role_version'
+STALE, VALID = 'stale', 'valid'
+
+
+def role_claims_setting(name):
+    return getattr(settings, 'TOKEN_ROLE_CLAIMS', {}).get(
+        name, DEFAULTS[name]
+    )
+
+
+class RoleAccessToken(AccessToken):
+
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        if role_claims_setting('ENABLED'):
+            token['username'] = user.username
+            token['role'] = user.role
+            token['is_staff'] = user.is_staff
+            token['is_superuser'] = user.is_superuser
+            token[VERSION_CLAIM] = get_version(User, user.pk)
+        return token
+
+
+class RoleTokenUser(TokenUser):
+    """Пользователь, собранный из утверждений токена."""
+    is_admin = User.is_admin
+    is_moderator = User.is_moderator
+
+    @cached_property
+    def role(self):
+        return self.token.get('role', UserRoles.user.name)
+
+
+def check_role_claims(token):
+    """
+    None - в токене нет ролей или версия ролей неизвестна (вытеснена
+    из кеша), VALID - роли в токене актуальны, STALE - роль менялась.
+    """
+    version = token.get(VERSION_CLAIM)
+    if version is None or not role_claims_setting('ENABLED'):
+        return None
+    current = cache.get(version_key(User, token[api_settings.USER_ID_CLAIM]))
+    if current is None:
+        return None
+    return VALID if current == version else STALE
@@ -28,5 +28,11 @@ auth_urls = [
 
 urlpatterns = [
     path('v1/', include(router_v1.urls)),
-    path('v1/auth/', include(auth_urls))
+    path('v1/auth/', include(auth_urls)),
+    path(
+        'v1/export/<slug:name>.<slug:fmt>',
+        views.ExportView.as_view(),
+        name='export'
+    ),
+    path('v1/metrics/', views.MetricsView.as_view(), name='metrics')
 ]
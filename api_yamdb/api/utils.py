@@ -1,12 +1,11 @@
-from django.core.mail import send_mail
+from core.outbox import queue_mail
 
 
 def send_confirmation_code(email, confirmation_code):
-    """Отправляет код подтверждения на почту пользователю."""
-    send_mail(
+    """Ставит в очередь письмо с кодом подтверждения пользователю."""
+    queue_mail(
         subject='Код подтверждения',
         message=f'Ваш код подтверждения: {confirmation_code}',
         from_email='registration_YAMDB@mail.com',
-        recipient_list=(email,),
-        fail_silently=False,
+        recipient=email,
     )
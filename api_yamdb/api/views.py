@@ -1,26 +1,38 @@
 from django.contrib.auth.tokens import default_token_generator
-from django.db.models import Avg
+from django.core.cache import cache
+from django.http import Http404, HttpResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import filters, permissions, status, viewsets
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from rest_framework_simplejwt.tokens import AccessToken
 
+from core.cache import bump_version, get_version
+from core.export import FORMATS, LAYOUT_BY_NAME
+from core.metrics import render
+from core.outbox import outbox_stats
 from .filters import TitleFilter
-from .permissions import (IsAnonimReadOnly,
-                          IsSuperUserIsAdminIsModeratorIsAuthor,
-                          IsSuperUserOrIsAdminOnly)
-from reviews.models import Category, Genre, Review, Title
-from .serializers import (CategorySerializer, CommentSerializer,
-                          GenreSerializer, ReviewSerializer,
+from .pagination import TitlePagination
+from .permissions import IsAnonimReadOnly, IsSuperUserOrIsAdminOnly
+from reviews.leaderboard import leaderboard_setting, trend_weight
+from reviews.models import (Category, Comment, Genre, Review, Title,
+                            TrendingEpoch)
+from reviews.rating import deferred_rating
+from .serializers import (CategorySerializer, CommentBulkSerializer,
+                          CommentSerializer, GenreSerializer,
+                          ReviewBulkSerializer, ReviewSerializer,
                           TitleCreateSerializer, TitleSerializer,
                           UserCreateSerializer, UserSerializer,
                           UserTokenReceiveSerializer)
+from .throttling import (ConfirmationCodeIPThrottle,
+                         ConfirmationCodeUsernameThrottle)
+from .tokens import RoleAccessToken
 from users.models import User
 from .utils import send_confirmation_code
-from .viewsetmixin import CategoryGenreBase
+from .viewsetmixin import (AsyncReadMixin, CategoryGenreBase,
+                           ConditionalGetMixin, ProfiledSerializerMixin,
+                           TextAuthorBase)
 
 
 class APIUserPost(APIView):
@@ -43,6 +55,10 @@ class APIUserPost(APIView):
 
 class APIUserTokenReceive(APIView):
     permission_classes = (permissions.AllowAny,)
+    throttle_classes = (
+        ConfirmationCodeIPThrottle,
+        ConfirmationCodeUsernameThrottle
+    )
 
     def post(self, request, *args, **kwargs):
         """Предоставляет JWT токен после получения confirmation_code."""
@@ -55,11 +71,52 @@ class APIUserTokenReceive(APIView):
         if not default_token_generator.check_token(user, confirmation_code):
             message = {'confirmation_code': 'Код подтверждения невалиден'}
             return Response(message, status=status.HTTP_400_BAD_REQUEST)
-        message = {'token': str(AccessToken.for_user(user))}
+        message = {'token': str(RoleAccessToken.for_user(user))}
         return Response(message, status=status.HTTP_200_OK)
 
 
-class UserViewSet(viewsets.ModelViewSet):
+class ExportView(APIView):
+    """
+    Потоковая выгрузка таблицы в формате static/data:
+    /export/<файл>.csv или /export/<файл>.ndjson.
+    """
+    permission_classes = (IsSuperUserOrIsAdminOnly,)
+
+    def get(self, request, name, fmt):
+        if name not in LAYOUT_BY_NAME or fmt not in FORMATS:
+            raise Http404
+        _, model, columns, rename = LAYOUT_BY_NAME[name]
+        lines, content_type = FORMATS[fmt]
+        response = StreamingHttpResponse(
+            lines(model, columns, rename), content_type=content_type
+        )
+        response['Content-Disposition'] = (
+            f'attachment; filename="{name}.{fmt}"'
+        )
+        return response
+
+
+class MetricsView(APIView):
+    """Метрики запросов и очереди писем в текстовом формате Prometheus."""
+    permission_classes = (IsSuperUserOrIsAdminOnly,)
+    content_type = 'text/plain; version=0.0.4; charset=utf-8'
+
+    def get(self, request):
+        stats = outbox_stats()
+        return HttpResponse(render({
+            'outbox_pending': ('Письма в очереди.', stats['pending']),
+            'outbox_failed': (
+                'Письма, не отправленные после всех попыток.',
+                stats['failed']
+            ),
+            'outbox_delivery_seconds_avg': (
+                'Среднее время доставки последних писем.',
+                stats['delivery_avg']
+            ),
+        }), content_type=self.content_type)
+
+
+class UserViewSet(ProfiledSerializerMixin, viewsets.ModelViewSet):
     """Вьюсет для объектов модели User."""
     queryset = User.objects.all()
     serializer_class = UserSerializer
@@ -74,6 +131,10 @@ class UserViewSet(viewsets.ModelViewSet):
         'patch',
     ]
 
+    def perform_destroy(self, instance):
+        with deferred_rating():
+            instance.delete()
+
     @action(
         detail=False,
         methods=['get', 'patch'],
@@ -84,17 +145,19 @@ class UserViewSet(viewsets.ModelViewSet):
     def get_me_data(self, request):
         """Позволяет пользователю получать данные
         о себе и изменять свои данные."""
+        # request.user - облегченная копия из кеша, профиль читаем целиком
+        user = get_object_or_404(User, pk=request.user.pk)
         if request.method == 'PATCH':
             serializer = UserSerializer(
-                request.user,
+                user,
                 data=request.data,
                 partial=True,
                 context={'request': request}
             )
             serializer.is_valid(raise_exception=True)
-            serializer.save(role=request.user.role)
+            serializer.save(role=user.role)
             return Response(serializer.data, status=status.HTTP_200_OK)
-        serializer = UserSerializer(request.user)
+        serializer = UserSerializer(user)
         return Response(serializer.data, status=status.HTTP_200_OK)
 
 
@@ -108,51 +171,61 @@ class GenreViewSet(CategoryGenreBase):
     serializer_class = GenreSerializer
 
 
-class ReviewViewSet(viewsets.ModelViewSet):
+class ReviewViewSet(TextAuthorBase):
+    queryset = Review.objects.select_related('author')
     serializer_class = ReviewSerializer
-    permission_classes = (
-        permissions.IsAuthenticatedOrReadOnly,
-        IsSuperUserIsAdminIsModeratorIsAuthor
-    )
+    bulk_serializer_class = ReviewBulkSerializer
+    parent_model = Title
+    parent_field = 'title'
+    parent_lookup_kwargs = {'pk': 'title_id'}
 
-    def _title(self):
-        return get_object_or_404(Title, pk=self.kwargs.get('title_id'))
+    def check_bulk(self, items):
+        """Один отзыв автора на произведение: в БД и внутри пачки."""
+        authors = set(Review.objects.filter(
+            title=self.get_parent(),
+            author_id__in={obj.author_id for _, obj in items}
+        ).values_list('author_id', flat=True))
+        errors = {}
+        for index, obj in items:
+            if obj.author_id in authors:
+                errors[index] = {
+                    'non_field_errors': [
+                        'Отзыв на произведение уже существует'
+                    ]
+                }
+            authors.add(obj.author_id)
+        return errors
 
-    def get_queryset(self):
-        return self._title().reviews.all()
-
-    def perform_create(self, serializer):
-        serializer.save(
-            author=self.request.user,
-            title=self._title()
+    def bulk_created(self, objs):
+        title = self.get_parent()
+        epoch = TrendingEpoch.current()
+        Title.objects.filter(pk=title.pk).change_rating(
+            added=[obj.score for obj in objs],
+            trend=sum(trend_weight(obj.pub_date, epoch) for obj in objs)
         )
+        bump_version(Title)
+        bump_version(Title, title.pk)
 
 
-class CommentViewSet(viewsets.ModelViewSet):
+class CommentViewSet(TextAuthorBase):
+    queryset = Comment.objects.select_related('author')
     serializer_class = CommentSerializer
-    permission_classes = (
-        permissions.IsAuthenticatedOrReadOnly,
-        IsSuperUserIsAdminIsModeratorIsAuthor
-    )
-
-    def _review(self):
-        return get_object_or_404(Review, pk=self.kwargs.get('review_id'))
+    bulk_serializer_class = CommentBulkSerializer
+    parent_model = Review
+    parent_field = 'review'
+    parent_lookup_kwargs = {'pk': 'review_id', 'title_id': 'title_id'}
 
-    def get_queryset(self):
-        return self._review().comments.all()
-
-    def perform_create(self, serializer):
-        serializer.save(
-            author=self.request.user,
-            review=self._review()
-        )
+    def bulk_created(self, objs):
+        bump_version(Review, self.get_parent().pk)
 
 
-class TitleViewSet(viewsets.ModelViewSet):
-    queryset = Title.objects.annotate(
-        rating=Avg('reviews__score')
-    ).all().order_by('name')
+class TitleViewSet(AsyncReadMixin, ProfiledSerializerMixin,
+                   ConditionalGetMixin, viewsets.ModelViewSet):
+    queryset = Title.objects.select_related(
+        'category'
+    ).prefetch_related('genre').order_by('name')
     serializer_class = TitleSerializer
+    pagination_class = TitlePagination
     permission_classes = (IsAnonimReadOnly | IsSuperUserOrIsAdminOnly,)
     filter_backends = (DjangoFilterBackend, filters.OrderingFilter)
     filterset_class = TitleFilter
@@ -160,7 +233,53 @@ class TitleViewSet(viewsets.ModelViewSet):
     http_method_names = ['get', 'post', 'patch', 'delete']
     ordering_fields = ('name', 'year')
 
+    def get_conditional_versions(self):
+        return (
+            get_version(Title),
+            get_version(Category),
+            get_version(Genre),
+        )
+
     def get_serializer_class(self):
         if self.request.method in ('POST', 'PATCH'):
             return TitleCreateSerializer
         return super().get_serializer_class()
+
+    def perform_destroy(self, instance):
+        with deferred_rating():
+            instance.delete()
+
+    def leaderboard(self, request, queryset):
+        """
+        Первые LEADERBOARD['SIZE'] произведений, можно ограничить
+        ?category=<slug> или ?genre=<slug>. Порядок хранится в таблице
+        произведений, готовый ответ - в кеше до изменения данных.
+        """
+        key = 'leaderboard:{}:{}:{}'.format(
+            request.get_full_path(),
+            request.accepted_renderer.format,
+            ':'.join(map(str, self.get_conditional_versions()))
+        )
+        data = cache.get(key)
+        if data is None:
+            category = request.query_params.get('category')
+            if category:
+                queryset = queryset.filter(category__slug=category)
+            genre = request.query_params.get('genre')
+            if genre:
+                queryset = queryset.filter(genre__slug=genre)
+            data = self.get_serializer(
+                queryset[:leaderboard_setting('SIZE')], many=True
+            ).data
+            cache.set(key, data, leaderboard_setting('CACHE_TIMEOUT'))
+        return Response(data)
+
+    @action(detail=False, url_path='top', url_name='top')
+    def top(self, request):
+        """Лучшие произведения по сглаженному рейтингу."""
+        return self.leaderboard(request, self.get_queryset().leaders())
+
+    @action(detail=False, url_path='trending', url_name='trending')
+    def trending(self, request):
+        """Произведения, которые чаще всего оценивают в последнее время."""
+        return self.leaderboard(request, self.get_queryset().trending())
@@ -1,11 +1,91 @@
-from rest_framework import filters, viewsets
+from hashlib import md5
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, connection, transaction
+from django.shortcuts import get_object_or_404
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from rest_framework import filters, permissions, status, viewsets
+from rest_framework.decorators import action
+from rest_framework.exceptions import AuthenticationFailed, ValidationError
 from rest_framework.mixins import (CreateModelMixin, DestroyModelMixin,
                                    ListModelMixin)
+from rest_framework.parsers import JSONParser
+from rest_framework.response import Response
+
+from core.cache import get_version, peek_version
+from core.middleware import current_profile, profiled_serializer
+from users.cache import model_user
+from users.models import User
+
+from .asyncread import async_read_setting, async_read_view
+from .pagination import PubDatePagination
+from .parsers import NDJSONParser
+from .permissions import (IsAnonimReadOnly,
+                          IsSuperUserIsAdminIsModeratorIsAuthor,
+                          IsSuperUserOrIsAdminOnly)
+
+
+class ProfiledSerializerMixin:
+    """Учитывает время сериализации в профиле запроса, если он ведется."""
+
+    def get_serializer_class(self):
+        serializer_class = super().get_serializer_class()
+        if current_profile.get() is None:
+            return serializer_class
+        return profiled_serializer(serializer_class)
+
+
+class AsyncReadMixin:
+    """Асинхронное представление при ASYNC_READ['ENABLED'], см. asyncread."""
 
-from .permissions import IsAnonimReadOnly, IsSuperUserOrIsAdminOnly
+    @classmethod
+    def as_view(cls, actions=None, **initkwargs):
+        view = super().as_view(actions, **initkwargs)
+        if not async_read_setting('ENABLED'):
+            return view
+        return async_read_view(view)
+
+
+class ConditionalGetMixin:
+    """
+    ETag и Last-Modified для list и retrieve по версиям из core.cache.
+    Запросы с актуальными If-None-Match/If-Modified-Since получают 304
+    до обращения к БД и сериализатору.
+    """
+
+    def get_conditional_versions(self):
+        """Версии данных, от которых зависит ответ."""
+        raise NotImplementedError
+
+    def conditional(self, handler, request, *args, **kwargs):
+        versions = self.get_conditional_versions()
+        etag = quote_etag(md5(':'.join(
+            [request.get_host(), request.get_full_path(),
+             request.accepted_renderer.format]
+            + [str(version) for version in versions]
+        ).encode()).hexdigest())
+        last_modified = max(versions) // 10 ** 9
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        if response is None:
+            response = handler(request, *args, **kwargs)
+        if response.status_code in (200, 304):
+            response['ETag'] = etag
+            response['Last-Modified'] = http_date(last_modified)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional(super().retrieve, request, *args, **kwargs)
 
 
 class CategoryGenreBase(
+    ProfiledSerializerMixin,
     CreateModelMixin,
     ListModelMixin,
     DestroyModelMixin,
@@ -16,3 +96,206 @@ class CategoryGenreBase(
     filter_backends = (filters.SearchFilter,)
     search_fields = ('name',)
     lookup_field = 'slug'
+
+    def get_list_cache_key(self, request):
+        model = self.get_queryset().model
+        params = '&'.join(
+            f'{key}={value}'
+            for key, values in sorted(request.query_params.lists())
+            for value in values
+        )
+        return (
+            f'list:{model._meta.label_lower}:v{get_version(model)}:'
+            f'{request.get_host()}:{params}'
+        )
+
+    def list(self, request, *args, **kwargs):
+        """
+        Список отдается из кеша. Ключ включает версию модели,
+        которая увеличивается при любом изменении записей.
+        """
+        key = self.get_list_cache_key(request)
+        data = cache.get(key)
+        if data is None:
+            response = super().list(request, *args, **kwargs)
+            cache.set(key, response.data, settings.REFERENCE_CACHE_TIMEOUT)
+            return response
+        return Response(data)
+
+
+class BulkCreateMixin:
+    """
+    Пакетная загрузка: POST .../bulk/ принимает JSON массив
+    или NDJSON поток объектов. Элементы проверяются сериализатором
+    bulk_serializer_class без запросов к БД, авторы и ограничения
+    проверяются для всей пачки сразу, запись - одним bulk_create.
+    Ответ - результат по каждому элементу в порядке запроса.
+    """
+    bulk_serializer_class = None
+
+    def check_bulk(self, items):
+        """
+        Проверки пачки объектов (индекс, объект) набором запросов.
+        Возвращает ошибки по индексам.
+        """
+        return {}
+
+    def bulk_created(self, objs):
+        """Обновляет зависимые данные: bulk_create не вызывает сигналы."""
+
+    def bulk_error(self, index, errors):
+        return {
+            'index': index,
+            'status': status.HTTP_400_BAD_REQUEST,
+            'errors': errors
+        }
+
+    def fill_bulk_ids(self, objs):
+        """
+        SQLite не возвращает id из bulk_create. Запись идет под
+        блокировкой всей БД, поэтому строки пачки получают последние id.
+        """
+        if not objs or objs[0].pk is not None:
+            return
+        if connection.vendor != 'sqlite':
+            return
+        model = type(objs[0])
+        ids = model.objects.order_by('-pk').values_list(
+            'pk', flat=True
+        )[:len(objs)]
+        for obj, pk in zip(objs, reversed(ids)):
+            obj.pk = pk
+
+    @action(
+        detail=False,
+        methods=['post'],
+        url_path='bulk',
+        url_name='bulk',
+        permission_classes=(IsSuperUserOrIsAdminOnly,),
+        parser_classes=(JSONParser, NDJSONParser)
+    )
+    def bulk(self, request, *args, **kwargs):
+        items = request.data
+        if not isinstance(items, list):
+            raise ValidationError('Ожидается массив объектов.')
+        if len(items) > settings.BULK_CREATE_LIMIT:
+            raise ValidationError(
+                f'Не больше {settings.BULK_CREATE_LIMIT} объектов за запрос.'
+            )
+        results = {}
+        objs = self.bulk_objects(items, results)
+        for index, errors in self.check_bulk(objs).items():
+            results[index] = self.bulk_error(index, errors)
+        objs = [(index, obj) for index, obj in objs if index not in results]
+
+        try:
+            with transaction.atomic():
+                created = self.get_queryset().model.objects.bulk_create(
+                    [obj for _, obj in objs]
+                )
+                self.fill_bulk_ids(created)
+                if created:
+                    self.bulk_created(created)
+        except IntegrityError:
+            raise ValidationError(
+                'Данные изменились во время загрузки, повторите запрос.'
+            )
+        for index, obj in objs:
+            results[index] = {
+                'index': index,
+                'status': status.HTTP_201_CREATED,
+                'id': obj.pk
+            }
+        return Response([results[index] for index in range(len(items))])
+
+    def bulk_objects(self, items, results):
+        """
+        Объекты модели из прошедших проверку элементов.
+        Ошибки элементов записываются в results.
+        """
+        parent = self.get_parent()
+        model = self.get_queryset().model
+        valid = []
+        for index, item in enumerate(items):
+            serializer = self.bulk_serializer_class(data=item)
+            if serializer.is_valid():
+                valid.append((index, serializer.validated_data))
+            else:
+                results[index] = self.bulk_error(index, serializer.errors)
+
+        authors = dict(User.objects.filter(
+            username__in={data['author'] for _, data in valid
+                          if 'author' in data}
+        ).values_list('username', 'pk'))
+        objs = []
+        for index, data in valid:
+            name = data.pop('author', None)
+            author_id = (
+                self.request.user.pk if name is None else authors.get(name)
+            )
+            if author_id is None:
+                results[index] = self.bulk_error(
+                    index, {'author': [f'Пользователь {name} не найден.']}
+                )
+                continue
+            objs.append((index, model(
+                author_id=author_id, **{self.parent_field: parent}, **data
+            )))
+        return objs
+
+
+class TextAuthorBase(AsyncReadMixin, ProfiledSerializerMixin, BulkCreateMixin,
+                     ConditionalGetMixin, viewsets.ModelViewSet):
+    """
+    Базовая view для Отзыва и Комментария.
+    Родительский объект проверяется по всей цепочке из URL одним запросом
+    и загружается один раз за запрос.
+    """
+    permission_classes = (
+        permissions.IsAuthenticatedOrReadOnly,
+        IsSuperUserIsAdminIsModeratorIsAuthor
+    )
+    pagination_class = PubDatePagination
+    parent_model = None
+    parent_field = None
+    # поле родительской модели -> именованный аргумент из URL
+    parent_lookup_kwargs = {}
+
+    def get_conditional_versions(self):
+        # get_queryset() проверяет родителя запросом к БД
+        model = self.queryset.model
+        parent_pk = self.kwargs.get(self.parent_lookup_kwargs['pk'])
+        parent_version = peek_version(self.parent_model, parent_pk)
+        if parent_version is None:
+            # ключ версии создается только для существующего родителя,
+            # иначе запросы с произвольными id заполняют кеш
+            self.get_parent()
+            parent_version = get_version(self.parent_model, parent_pk)
+        return parent_version, get_version(model), get_version(User)
+
+    def get_parent(self):
+        if not hasattr(self, '_parent'):
+            self._parent = get_object_or_404(
+                self.parent_model,
+                **{
+                    field: self.kwargs.get(kwarg)
+                    for field, kwarg in self.parent_lookup_kwargs.items()
+                }
+            )
+        return self._parent
+
+    def get_queryset(self):
+        return super().get_queryset().filter(
+            **{self.parent_field: self.get_parent()}
+        )
+
+    def perform_create(self, serializer):
+        author = model_user(self.request.user)
+        if author is None:
+            raise AuthenticationFailed(
+                'Пользователь не найден', code='user_not_found'
+            )
+        serializer.save(
+            author=author,
+            **{self.parent_field: self.get_parent()}
+        )
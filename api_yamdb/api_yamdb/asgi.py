@@ -12,5 +12,8 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'api_yamdb.settings')
+# чтение произведений, отзывов и комментариев без общего потока,
+# см. api/asyncread.py
+os.environ.setdefault('ASYNC_READ', '1')
 
 application = get_asgi_application()
@@ -31,6 +31,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.MetricsMiddleware',
+    'core.middleware.QueryProfileMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -112,15 +114,94 @@ STATICFILES_DIRS = (os.path.join(BASE_DIR, 'static/'),)
 AUTH_USER_MODEL = 'users.User'
 
 
+# версии данных для кеша справочников и ETag хранятся здесь же:
+# при нескольких процессах нужен общий кеш (файловый, memcached, redis)
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
+# время жизни закешированных списков категорий и жанров, сек
+REFERENCE_CACHE_TIMEOUT = 60 * 60
+
+# максимальное количество произведений в результатах поиска
+TITLE_SEARCH_LIMIT = 100
+
+# рейтинги лидеров /titles/top/ и /titles/trending/,
+# см. reviews/leaderboard.py
+LEADERBOARD = {
+    'PRIOR_MEAN': 5.5,
+    'PRIOR_COUNT': 5,
+    'MIN_REVIEWS': 1,
+    'TRENDING_HALF_LIFE': 7 * 24 * 3600,
+    'SIZE': 10,
+    'CACHE_TIMEOUT': 600,
+}
+
+# профилирование SQL по запросам, см. core/middleware.py
+QUERY_PROFILE = {
+    'ENABLED': False,
+    'SAMPLE_RATE': 0.1,
+    'DUPLICATE_THRESHOLD': 2,
+    'HEADER': True,
+    'LOG': True,
+}
+
+# метрики запросов для Prometheus, см. core/metrics.py;
+# при нескольких процессах gunicorn задайте MULTIPROCESS_DIR
+METRICS = {
+    'ENABLED': True,
+    'BUCKETS': (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+    'MULTIPROCESS_DIR': os.getenv('METRICS_MULTIPROCESS_DIR'),
+    'FLUSH_INTERVAL': 1.0,
+}
+
+# асинхронное чтение произведений, отзывов и комментариев под ASGI,
+# см. api/asyncread.py; asgi.py включает его по умолчанию
+ASYNC_READ = {
+    'ENABLED': os.getenv('ASYNC_READ') == '1',
+    'THREADS': int(os.getenv('ASYNC_READ_THREADS', 4)),
+}
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'core.profile': {
+            'handlers': ['console'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+    },
+}
+
+# объектов в одном запросе пакетной загрузки отзывов и комментариев
+BULK_CREATE_LIMIT = 5000
+
+# время жизни копии пользователя для аутентификации, сек
+USER_SNAPSHOT_TIMEOUT = 60
+
+
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'api.authentication.CachedJWTAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 4,
+    'DEFAULT_THROTTLE_RATES': {
+        'confirmation_ip': '30/min',
+        'confirmation_username': '5/min',
+    },
+    # число доверенных прокси перед приложением: IP клиента для
+    # ограничений берется из X-Forwarded-For только за ними
+    'NUM_PROXIES': int(os.getenv('NUM_PROXIES', 0)),
 }
 
 SIMPLE_JWT = {
@@ -128,5 +209,22 @@ SIMPLE_JWT = {
     'AUTH_HEADER_TYPES': ('Bearer',),
 }
 
+# роль в access токене, см. api/tokens.py
+TOKEN_ROLE_CLAIMS = {
+    'ENABLED': True,
+    # после смены роли: 'reload' - права берутся из БД,
+    # 'revoke' - токен отклоняется до получения нового
+    'ON_ROLE_CHANGE': 'reload',
+}
+
 EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
+
+# очередь исходящих писем, см. core/outbox.py
+EMAIL_OUTBOX = {
+    'WORKER': 'thread',
+    'BATCH_SIZE': 50,
+    'MAX_ATTEMPTS': 5,
+    'RETRY_DELAY': 30,
+    'LEASE': 300,
+}
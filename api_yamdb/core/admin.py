@@ -0,0 +1,13 @@
+from django.contrib import admin
+
+from .models import OutgoingEmail
+
+
+@admin.register(OutgoingEmail)
+class OutgoingEmailAdmin(admin.ModelAdmin):
+    list_display = (
+        'pk', 'recipient', 'subject', 'created', 'attempts', 'sent'
+    )
+    list_filter = ('sent',)
+    search_fields = ('recipient',)
+    empty_value_display = '-пусто-'
@@ -0,0 +1,32 @@
+import time
+
+from django.core.cache import cache
+
+VERSION_KEY = 'version:{label}'
+
+
+def version_key(model, pk=None) -> str:
+    key = VERSION_KEY.format(label=model._meta.label_lower)
+    return key if pk is None else f'{key}:{pk}'
+
+
+def get_version(model, pk=None) -> int:
+    """
+    Текущая версия данных модели (или одного объекта) для ключей кеша
+    и ETag. Версия - время последнего изменения в наносекундах, поэтому
+    после вытеснения ключа из кеша она не повторяет прежние значения.
+    """
+    return cache.get_or_set(version_key(model, pk), time.time_ns(), None)
+
+
+def peek_version(model, pk=None):
+    """
+    Версия без записи в кеш: None, если ее еще нет. Для объектов
+    из URL, которые могут не существовать.
+    """
+    return cache.get(version_key(model, pk))
+
+
+def bump_version(model, pk=None):
+    """Делает недействительными все закешированные ответы по модели."""
+    cache.set(version_key(model, pk), time.time_ns(), None)
@@ -0,0 +1,88 @@
+"""
+Выгрузка таблиц в формате файлов static/data.
+
+Строки читаются QuerySet.iterator() порциями по chunk_size и сразу
+отдаются генератором, поэтому расход памяти не зависит от размера
+таблицы.
+"""
+import csv
+import json
+from datetime import date, datetime
+
+from reviews.models import Category, Comment, Genre, Review, Title, TitleGenre
+from users.models import User
+
+CHUNK_SIZE = 2000
+# файл, модель, колонки CSV по порядку, переименование колонок в поля
+CSV_LAYOUT = (
+    ('category.csv', Category, ('id', 'name', 'slug'), {}),
+    ('genre.csv', Genre, ('id', 'name', 'slug'), {}),
+    ('users.csv', User,
+     ('id', 'username', 'email', 'role', 'bio', 'first_name', 'last_name'),
+     {}),
+    ('titles.csv', Title,
+     ('id', 'name', 'year', 'category', 'description'),
+     {'category': 'category_id'}),
+    ('genre_title.csv', TitleGenre, ('id', 'title_id', 'genre_id'), {}),
+    ('review.csv', Review,
+     ('id', 'title_id', 'text', 'author', 'score', 'pub_date'),
+     {'author': 'author_id'}),
+    ('comments.csv', Comment,
+     ('id', 'review_id', 'text', 'author', 'pub_date'),
+     {'author': 'author_id'}),
+)
+LAYOUT_BY_NAME = {
+    file.rsplit('.', 1)[0]: (file, model, columns, rename)
+    for file, model, columns, rename in CSV_LAYOUT
+}
+
+
+class Echo:
+    """Файлоподобный объект для csv.writer: возвращает строку как есть."""
+
+    def write(self, value):
+        return value
+
+
+def to_text(value):
+    if value is None:
+        return ''
+    if isinstance(value, datetime):
+        value = value.isoformat()
+        return value[:-6] + 'Z' if value.endswith('+00:00') else value
+    if isinstance(value, date):
+        return value.isoformat()
+    return value
+
+
+def export_rows(model, columns: tuple, rename: dict,
+                chunk_size: int = CHUNK_SIZE):
+    """Значения колонок по строкам таблицы в порядке id."""
+    fields = [rename.get(column, column) for column in columns]
+    return model.objects.order_by('pk').values_list(*fields).iterator(
+        chunk_size=chunk_size
+    )
+
+
+def csv_lines(model, columns: tuple, rename: dict,
+              chunk_size: int = CHUNK_SIZE):
+    """Строки CSV файла, начиная с заголовка."""
+    writer = csv.writer(Echo())
+    yield writer.writerow(columns)
+    for row in export_rows(model, columns, rename, chunk_size):
+        yield writer.writerow([to_text(value) for value in row])
+
+
+def ndjson_lines(model, columns: tuple, rename: dict,
+                 chunk_size: int = CHUNK_SIZE):
+    """Строки NDJSON: по объекту с колонками CSV в строке."""
+    for row in export_rows(model, columns, rename, chunk_size):
+        yield json.dumps(
+            dict(zip(columns, row)), ensure_ascii=False, default=to_text
+        ) + '\n'
+
+
+FORMATS = {
+    'csv': (csv_lines, 'text/csv; charset=utf-8'),
+    'ndjson': (ndjson_lines, 'application/x-ndjson; charset=utf-8'),
+}
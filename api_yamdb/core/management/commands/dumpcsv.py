@@ -0,0 +1,57 @@
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.export import CHUNK_SIZE, CSV_LAYOUT, LAYOUT_BY_NAME, csv_lines
+
+
+class Command(BaseCommand):
+    help = 'Выгрузка данных в CSV файлы в формате loadcsv'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'names',
+            nargs='*',
+            help='Выгружаемые файлы без расширения, по умолчанию все'
+        )
+        parser.add_argument(
+            '--output',
+            type=Path,
+            default=Path(settings.BASE_DIR, 'dump'),
+            help='Каталог для CSV файлов'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=CHUNK_SIZE,
+            help='Количество строк, читаемых из БД за раз'
+        )
+
+    def handle(self, *args, **options):
+        unknown = set(options['names']) - LAYOUT_BY_NAME.keys()
+        if unknown:
+            raise CommandError(
+                f'неизвестные файлы: {", ".join(sorted(unknown))}'
+            )
+        layout = [
+            LAYOUT_BY_NAME[name] for name in options['names']
+        ] or CSV_LAYOUT
+        options['output'].mkdir(parents=True, exist_ok=True)
+
+        print(f'выгрузка данных в {options["output"]}:')
+        for file, model, columns, rename in layout:
+            start = time.monotonic()
+            count = 0
+            with open(Path(options['output'], file), 'w',
+                      encoding='utf-8', newline='') as h_file:
+                for count, line in enumerate(csv_lines(
+                    model, columns, rename, options['chunk_size']
+                )):
+                    h_file.write(line)
+            elapsed = time.monotonic() - start
+            print(
+                f'{file} - \033[32m OK \033[0;0m{count} строк, '
+                f'{count / max(elapsed, 1e-6):.0f} строк/с'
+            )
@@ -1,121 +1,465 @@
 import csv
+import hashlib
+import json
 import os
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from functools import partial
+from itertools import islice
 from pathlib import Path
 
 from django.conf import settings
-from django.core.management.base import BaseCommand
-from django.db import models
-from reviews.models import Category, Comment, Genre, Review, Title, TitleGenre
-from users.models import User
-
-
-def create_simple_model(file_data: csv.DictReader, model: models.Model):
-    """Создание простой модели."""
-    model.objects.all().delete()
-    model.objects.bulk_create(
-        [
-            model(**row)
-            for row in file_data
-        ]
-    )
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.db import (DatabaseError, connection, connections, models,
+                       transaction)
+from django.db.models.deletion import get_candidate_relations_to_delete
+from core.cache import bump_version
+from core.export import CSV_LAYOUT
+from reviews.models import Review, Title, TitleGenre
+from reviews.search import rebuild_index
 
+from .seed_bench import explicit_dates
 
-def create_title_model(file_data: csv.DictReader, model: Title):
-    """Создание модели Title."""
-    model.objects.all().delete()
-    model.objects.bulk_create(
-        [
-            model(
-                id=row.get('id'),
-                name=row.get('name'),
-                year=row.get('year'),
-                category=Category.objects.get(id=row.get('category'))
-            )
-            for row in file_data
-        ]
-    )
+BATCH_SIZE = 1000
+STATE_FILE = '.loadcsv_state.json'
+UNCHANGED = 'unchanged'
 
 
-def create_genre_title_model(file_data: csv.DictReader, model: TitleGenre):
-    """Создание модели TitleGenre."""
-    model.objects.all().delete()
-    model.objects.bulk_create(
-        [
-            model(
-                id=row.get('id'),
-                title=Title.objects.get(id=row.get('title_id')),
-                genre=Genre.objects.get(id=row.get('genre_id'))
-            )
-            for row in file_data
-        ]
-    )
+class LoadError(CommandError):
+    """Ошибка загрузки файла с указанием строки."""
 
 
-def create_review_model(file_data: csv.DictReader, model: Review):
-    """Создание модели Review."""
-    model.objects.all().delete()
-    model.objects.bulk_create(
-        [
-            model(
-                id=row.get('id'),
-                title=Title.objects.get(id=row.get('title_id')),
-                text=row.get('text'),
-                author=User.objects.get(id=row.get('author')),
-                score=row.get('score'),
-                pub_date=row.get('pub_date')
-            )
-            for row in file_data
-        ]
-    )
+def foreign_keys(model: models.Model) -> list:
+    """Поля модели, ссылающиеся на другие модели."""
+    return [
+        field for field in model._meta.concrete_fields if field.many_to_one
+    ]
 
 
-def create_comments_model(file_data: csv.DictReader, model: Comment):
-    """Создание модели  Comments."""
-    model.objects.all().delete()
-    model.objects.bulk_create(
-        [
-            model(
-                id=row.get('id'),
-                review=Review.objects.get(id=row.get('review_id')),
-                text=row.get('text'),
-                author=User.objects.get(id=row.get('author')),
-                pub_date=row.get('pub_date')
-            )
-            for row in file_data
+def load_stages(link_models: tuple) -> list:
+    """
+    Группирует файлы в этапы по FK зависимостям моделей:
+    файлы одного этапа не зависят друг от друга.
+    """
+    loaded = {model for _, model, _ in link_models}
+    pending = list(link_models)
+    done = set()
+    stages = []
+    while pending:
+        stage = [
+            spec for spec in pending
+            if {
+                field.related_model for field in foreign_keys(spec[1])
+            } & loaded - {spec[1]} <= done
         ]
+        if not stage:
+            raise CommandError('Циклическая зависимость между файлами')
+        stages.append(stage)
+        done |= {model for _, model, _ in stage}
+        pending = [spec for spec in pending if spec not in stage]
+    return stages
+
+
+def read_rows(file_data: csv.DictReader, model: models.Model,
+              columns: dict):
+    """Построчно отдает номер строки файла и объект модели."""
+    fk_names = {field.attname for field in foreign_keys(model)}
+    fields = {
+        field.attname: field for field in model._meta.concrete_fields
+    }
+    try:
+        for row in file_data:
+            line = file_data.line_num
+            data = {columns.get(key, key): value for key, value in row.items()}
+            try:
+                for name in data.keys() & fields.keys():
+                    if name in fk_names:
+                        data[name] = int(data[name]) if data[name] else None
+                    else:
+                        data[name] = fields[name].to_python(data[name])
+                yield line, model(**data)
+            except (TypeError, ValueError, ValidationError) as error:
+                raise LoadError(f'строка {line}: {error}')
+    except (csv.Error, UnicodeDecodeError) as error:
+        raise LoadError(f'строка {file_data.line_num}: {error}')
+
+
+def batches(rows, size: int):
+    """Делит поток строк на пачки, не читая файл целиком."""
+    rows = iter(rows)
+    batch = list(islice(rows, size))
+    while batch:
+        yield batch
+        batch = list(islice(rows, size))
+
+
+def check_foreign_keys(batch: list, model: models.Model):
+    """Проверяет ссылки пачки одним запросом на каждое FK поле."""
+    for field in foreign_keys(model):
+        ids = {
+            getattr(obj, field.attname) for _, obj in batch
+        } - {None}
+        found = set(
+            field.related_model.objects.filter(
+                pk__in=ids
+            ).values_list('pk', flat=True)
+        )
+        for line, obj in batch:
+            value = getattr(obj, field.attname)
+            if value is not None and value not in found:
+                raise LoadError(
+                    f'строка {line}: '
+                    f'{field.related_model.__name__} с id={value} не найден'
+                )
+
+
+def insert_batch(batch: list, model: models.Model, fields: list) -> int:
+    """Вставляет пачку после удаления всех записей модели."""
+    return len(model.objects.bulk_create(obj for _, obj in batch))
+
+
+def upsert_batch(batch: list, model: models.Model, fields: list) -> int:
+    """
+    Вставляет новые записи и обновляет изменившиеся по первичному ключу.
+    Сравниваются только поля, которые есть в файле.
+    """
+    objs = [obj for _, obj in batch]
+    existing = model.objects.only(
+        *[field.name for field in fields]
+    ).in_bulk([obj.pk for obj in objs])
+    new = [obj for obj in objs if obj.pk not in existing]
+    changed = [
+        obj for obj in objs
+        if obj.pk in existing and any(
+            getattr(obj, field.attname)
+            != getattr(existing[obj.pk], field.attname)
+            for field in fields
+        )
+    ]
+    model.objects.bulk_create(new)
+    if changed and fields:
+        model.objects.bulk_update(changed, [field.name for field in fields])
+    return len(new) + len(changed)
+
+
+def clear_plan(model: models.Model) -> tuple:
+    """
+    Очистка таблицы модели с учетом on_delete: модели для DELETE
+    (зависимые раньше тех, на кого ссылаются) и поля SET_NULL.
+    """
+    deleted = []
+    nulled = []
+    seen = set()
+
+    def visit(model):
+        seen.add(model)
+        for relation in get_candidate_relations_to_delete(model._meta):
+            on_delete = relation.field.remote_field.on_delete
+            if on_delete is models.CASCADE:
+                if relation.related_model not in seen:
+                    visit(relation.related_model)
+            elif on_delete is models.SET_NULL:
+                nulled.append(relation.field)
+            elif on_delete is not models.DO_NOTHING:
+                raise LoadError(
+                    f'{relation.related_model.__name__}.'
+                    f'{relation.field.name}: '
+                    'очистка таблицы не поддерживается'
+                )
+        deleted.append(model)
+
+    visit(model)
+    return deleted, nulled
+
+
+def clear_table(model: models.Model) -> set:
+    """
+    Удаляет все записи модели и каскадно зависимых моделей, не загружая
+    объекты в память и без сигналов удаления: по DELETE на таблицу,
+    ссылки SET_NULL обнуляются одним UPDATE. Возвращает измененные модели.
+    """
+    deleted, nulled = clear_plan(model)
+    for field in nulled:
+        field.model._base_manager.update(**{field.name: None})
+    for cleared in deleted:
+        queryset = cleared._base_manager.all()
+        queryset._raw_delete(queryset.db)
+    return set(deleted) | {field.model for field in nulled}
+
+
+def load_file(file_data: csv.DictReader, model: models.Model, columns: dict,
+              batch_size: int = BATCH_SIZE, mode: str = 'replace') -> tuple:
+    """
+    Потоковая загрузка модели пачками по batch_size строк.
+    В режиме replace таблица очищается заранее, см. clear_table.
+    Возвращает количество прочитанных и записанных строк.
+    """
+    names = {columns.get(name, name) for name in file_data.fieldnames or ()}
+    pk_name = model._meta.pk.attname
+    fields = [
+        field for field in model._meta.concrete_fields
+        if field.attname in names and field.attname != pk_name
+    ]
+    if mode == 'upsert':
+        if pk_name not in names:
+            raise LoadError(f'нет колонки {pk_name} для обновления')
+        write_batch = upsert_batch
+    else:
+        write_batch = insert_batch
+    # даты из файла сохраняются как есть и при вставке, и при обновлении
+    dates = (
+        explicit_dates(model)
+        if any(getattr(field, 'auto_now_add', False) for field in fields)
+        else nullcontext()
     )
+    count = written = 0
+    with dates:
+        for batch in batches(read_rows(file_data, model, columns),
+                             batch_size):
+            check_foreign_keys(batch, model)
+            try:
+                written += write_batch(batch, model, fields)
+            except (DatabaseError, TypeError, ValueError,
+                    ValidationError) as error:
+                raise LoadError(
+                    f'строки {batch[0][0]}-{batch[-1][0]}: {error}'
+                )
+            count += len(batch)
+    return count, written
+
+
+def read_state(path: Path) -> dict:
+    """Контрольные суммы файлов на момент последней успешной загрузки."""
+    try:
+        with open(path, encoding='utf-8') as h_file:
+            return json.load(h_file)
+    except (OSError, ValueError):
+        return {}
+
+
+def write_state(path: Path, state: dict):
+    with open(path, 'w', encoding='utf-8') as h_file:
+        json.dump(state, h_file, indent=2, sort_keys=True)
+
+
+def checksum(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as h_file:
+        for chunk in iter(lambda: h_file.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
 
 
 class Command(BaseCommand):
     help = 'Загрузка данных из CSV файлов'
-    link_models = (
-        ('category.csv', Category, create_simple_model),
-        ('genre.csv', Genre, create_simple_model),
-        ('users.csv', User, create_simple_model),
-        ('titles.csv', Title, create_title_model),
-        ('genre_title.csv', TitleGenre, create_genre_title_model),
-        ('review.csv', Review, create_review_model),
-        ('comments.csv', Comment, create_comments_model)
+    # файл, модель, переименование колонок CSV в поля модели
+    link_models = tuple(
+        (file, model, rename) for file, model, _, rename in CSV_LAYOUT
     )
+    # bulk_create и clear_table не вызывают сигналы: после загрузки
+    # версии измененных моделей в кеше меняются всегда, а зависимые
+    # данные обновляются здесь
+    post_load = {
+        Title: (rebuild_index,),
+        TitleGenre: (partial(bump_version, Title),),
+        Review: (
+            Title.objects.rebuild_rating,
+            Title.objects.rebuild_trending,
+            partial(bump_version, Title)
+        ),
+    }
+
+    # таблицы, которые меняют обработчики post_load
+    post_load_writes = {Review: (Title,)}
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=BATCH_SIZE,
+            help='Количество строк в одном INSERT'
+        )
+        parser.add_argument(
+            '--atomic',
+            choices=('file', 'run'),
+            default='file',
+            help='Транзакция на каждый файл или на всю загрузку'
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=1,
+            help='Количество файлов одного этапа, загружаемых параллельно'
+        )
+        parser.add_argument(
+            '--mode',
+            choices=('replace', 'upsert'),
+            default='replace',
+            help='Пересоздать таблицы или дописать и обновить записи по id'
+        )
+        parser.add_argument(
+            '--skip-unchanged',
+            action='store_true',
+            help='Пропускать файлы, не изменившиеся с прошлой загрузки '
+                 '(только для --mode upsert)'
+        )
+        parser.add_argument(
+            '--state-file',
+            default=Path(settings.BASE_DIR, STATE_FILE),
+            type=Path,
+            help='Файл с контрольными суммами загруженных файлов'
+        )
+
+    def load(self, path: Path, model: models.Model, columns: dict,
+             batch_size: int, mode: str):
+        with open(path, encoding='utf-8') as h_file:
+            file_reader = csv.DictReader(h_file, delimiter=",")
+            start = time.monotonic()
+            with transaction.atomic():
+                changed = clear_table(model) if mode == 'replace' else set()
+                count, written = load_file(
+                    file_reader, model, columns, batch_size, mode
+                )
+                if written:
+                    changed.add(model)
+                for changed_model in changed:
+                    bump_version(changed_model)
+                    for hook in self.post_load.get(changed_model, ()):
+                        hook()
+        return count, written, time.monotonic() - start
+
+    def try_load(self, *args):
+        try:
+            return self.load(*args)
+        except LoadError as error:
+            return error
+
+    def try_load_in_thread(self, *args):
+        # у каждого потока свое соединение с БД, закрываем его сами
+        try:
+            return self.try_load(*args)
+        finally:
+            connections.close_all()
+
+    def written_models(self, model: models.Model, mode: str) -> set:
+        """Таблицы, которые меняет загрузка файла модели."""
+        changed = {model}
+        if mode == 'replace':
+            deleted, nulled = clear_plan(model)
+            changed.update(deleted, [field.model for field in nulled])
+        for changed_model in list(changed):
+            changed.update(self.post_load_writes.get(changed_model, ()))
+        return changed
+
+    def parallel_tasks(self, tasks: list) -> list:
+        """
+        Номера файлов этапа, которые не меняют общих таблиц с другими
+        файлами. Например, очистка users.csv удаляет отзывы и
+        пересчитывает рейтинг произведений, а очистка category.csv
+        обнуляет категорию у тех же произведений.
+        """
+        try:
+            writes = [
+                self.written_models(model, mode)
+                for _, model, _, _, mode in tasks
+            ]
+        except LoadError:
+            return []
+        counts = Counter(model for changed in writes for model in changed)
+        return [
+            index for index, changed in enumerate(writes)
+            if all(counts[model] == 1 for model in changed)
+        ]
+
+    def run_stage(self, tasks: list, workers: int) -> list:
+        """Файлы, меняющие общие таблицы, грузятся по очереди."""
+        parallel = []
+        if workers > 1 and len(tasks) > 1:
+            parallel = self.parallel_tasks(tasks)
+        if len(parallel) < 2:
+            parallel = []
+        results = {
+            index: self.try_load(*args)
+            for index, args in enumerate(tasks) if index not in parallel
+        }
+        if parallel:
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                results.update(zip(parallel, pool.map(
+                    lambda index: self.try_load_in_thread(*tasks[index]),
+                    parallel
+                )))
+        return [results[index] for index in range(len(tasks))]
 
     def handle(self, *args, **options):
         work_dir = Path(settings.STATICFILES_DIRS[0], 'data')
         with os.scandir(work_dir) as files:
             files = [file.name for file in files if file.is_file()
                      and file.name.endswith('.csv')]
+        run_atomic = options['atomic'] == 'run'
+        workers = options['workers']
+        if run_atomic and workers > 1:
+            raise CommandError(
+                '--atomic run несовместим с параллельной загрузкой'
+            )
+        if options['skip_unchanged'] and options['mode'] != 'upsert':
+            # при пересоздании удаление каскадом очищает зависимые таблицы,
+            # поэтому пропускать их файлы нельзя
+            raise CommandError('--skip-unchanged требует --mode upsert')
+        if connection.vendor == 'sqlite' and workers > 1:
+            # SQLite допускает только одну пишущую транзакцию,
+            # параллельные загрузки упираются в database is locked
+            print('SQLite: файлы загружаются последовательно')
+            workers = 1
+        state = read_state(options['state_file'])
+        checksums = {file: checksum(Path(work_dir, file)) for file in files}
 
         print('загрузка данных из файла(ов):')
 
-        # будем грузить по порядку иначе будут проблемы
-        for file, model, func in self.link_models:
-            if file in files:
-                with open(Path(work_dir, file), encoding='utf-8') as h_file:
-                    file_reader = csv.DictReader(h_file, delimiter=",")
-                    print(f'{file} - ', end='')
-                    try:
-                        func(file_reader, model)
-                        print('\033[32m OK \033[0;0m')
-                    except Exception:
-                        print('\033[31m NO \033[0;0m')
-            else:
-                print(f'{file} - \033[31m NO \033[0;0m')
+        # этапы грузим по порядку, файлы внутри этапа - параллельно
+        with transaction.atomic() if run_atomic else nullcontext():
+            for number, stage in enumerate(load_stages(self.link_models), 1):
+                start = time.monotonic()
+                present = [spec for spec in stage if spec[0] in files]
+                results = {
+                    file: UNCHANGED for file, _, _ in present
+                    if options['skip_unchanged']
+                    and state.get(file) == checksums[file]
+                }
+                tasks = [spec for spec in present if spec[0] not in results]
+                results.update(zip(
+                    [file for file, _, _ in tasks],
+                    self.run_stage(
+                        [
+                            (Path(work_dir, file), model, columns,
+                             options['batch_size'], options['mode'])
+                            for file, model, columns in tasks
+                        ],
+                        workers
+                    )
+                ))
+                for file, _, _ in stage:
+                    self.report(file, results.get(file), run_atomic)
+                    if isinstance(results.get(file), tuple):
+                        state[file] = checksums[file]
+                print(f'этап {number}: {time.monotonic() - start:.2f} с')
+        write_state(options['state_file'], state)
+
+    def report(self, file: str, result, run_atomic: bool):
+        if result is None:
+            print(f'{file} - \033[31m NO \033[0;0m')
+        elif result == UNCHANGED:
+            print(f'{file} - без изменений')
+        elif isinstance(result, LoadError):
+            print(f'{file} - \033[31m NO \033[0;0m{result}')
+            if run_atomic:
+                raise CommandError('загрузка отменена')
+        else:
+            count, written, elapsed = result
+            print(
+                f'{file} - \033[32m OK \033[0;0m'
+                f'{count} строк, записано {written}, '
+                f'{count / max(elapsed, 1e-6):.0f} строк/с'
+            )
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+from reviews.models import Title
+
+
+class Command(BaseCommand):
+    help = 'Пересчет рейтингов произведений по таблице отзывов'
+
+    def handle(self, *args, **options):
+        count = Title.objects.rebuild_rating()
+        print(f'пересчитан рейтинг произведений: {count}')
+        count = Title.objects.rebuild_trending(rebase=True)
+        print(f'пересчитана популярность произведений: {count}')
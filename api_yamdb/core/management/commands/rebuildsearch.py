@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+from reviews.models import Title
+from reviews.search import get_index, rebuild_index
+
+
+class Command(BaseCommand):
+    help = 'Пересоздание полнотекстового индекса произведений'
+
+    def handle(self, *args, **options):
+        if get_index() is None:
+            print('полнотекстовый индекс для этой СУБД не поддерживается')
+            return
+        rebuild_index()
+        print(f'проиндексировано произведений: {Title.objects.count()}')
@@ -0,0 +1,212 @@
+import random
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from itertools import count, islice
+
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import connection, models, transaction
+
+from core.cache import bump_version
+from reviews.models import Category, Comment, Genre, Review, Title, TitleGenre
+from reviews.search import rebuild_index
+from users.models import User
+
+BATCH_SIZE = 5000
+# даты отзывов и комментариев отсчитываются от фиксированного момента,
+# чтобы повторный запуск давал те же данные
+SEED_EPOCH = datetime(2020, 1, 1, tzinfo=timezone.utc)
+PERIOD_MINUTES = 3 * 365 * 24 * 60
+WORDS = (
+    'тень', 'ветер', 'город', 'ночь', 'море', 'последний', 'тихий',
+    'дом', 'дорога', 'зима', 'огонь', 'время', 'звезда', 'северный',
+    'сад', 'голос', 'мост', 'путь', 'остров', 'старый',
+)
+# доли оценок 1..10: высокие оценки встречаются чаще
+SCORE_WEIGHTS = (2, 2, 3, 4, 6, 8, 12, 16, 14, 10)
+
+
+def zipf_counts(total: int, items: int, exponent: float, cap: int) -> list:
+    """
+    Делит total между items по закону Ципфа: доля i-го элемента
+    пропорциональна 1 / i ** exponent, но не больше cap.
+    """
+    weights = [1 / rank ** exponent for rank in range(1, items + 1)]
+    scale = total / sum(weights)
+    return [min(cap, round(weight * scale)) for weight in weights]
+
+
+def next_pk(model: models.Model) -> int:
+    return (model.objects.aggregate(
+        value=models.Max('pk')
+    )['value'] or 0) + 1
+
+
+@contextmanager
+def explicit_dates(*models):
+    """Отключает auto_now_add, чтобы даты задавались явно."""
+    fields = [
+        field for model in models for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now_add', False)
+    ]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+class Command(BaseCommand):
+    help = (
+        'Детерминированная генерация большого набора данных '
+        'для бенчмарков'
+    )
+
+    def add_arguments(self, parser):
+        for name, default, help_text in (
+            ('users', 100000, 'Количество пользователей'),
+            ('categories', 10, 'Количество категорий'),
+            ('genres', 50, 'Количество жанров'),
+            ('titles', 20000, 'Количество произведений'),
+            ('reviews', 1000000, 'Количество отзывов (примерно)'),
+            ('comments', 1000000, 'Количество комментариев'),
+            ('seed', 42, 'Зерно генератора случайных чисел'),
+            ('batch-size', BATCH_SIZE, 'Количество строк в одном INSERT'),
+        ):
+            parser.add_argument(
+                f'--{name}', type=int, default=default, help=help_text
+            )
+        parser.add_argument(
+            '--zipf',
+            type=float,
+            default=1.1,
+            help='Показатель распределения отзывов по произведениям '
+                 'и комментариев по отзывам, 0 - равномерно'
+        )
+
+    def insert(self, model, objs, batch_size: int) -> int:
+        start = time.monotonic()
+        written = 0
+        objs = iter(objs)
+        with transaction.atomic():
+            batch = list(islice(objs, batch_size))
+            while batch:
+                model.objects.bulk_create(batch)
+                written += len(batch)
+                batch = list(islice(objs, batch_size))
+        elapsed = time.monotonic() - start
+        print(
+            f'{model.__name__} - \033[32m OK \033[0;0m'
+            f'{written} строк, {written / max(elapsed, 1e-6):.0f} строк/с'
+        )
+        return written
+
+    def handle(self, *args, **options):
+        if min(options['users'], options['categories'], options['genres'],
+               options['titles']) < 1:
+            raise CommandError(
+                'нужен хотя бы один пользователь, категория, жанр '
+                'и произведение'
+            )
+        rnd = random.Random(options['seed'])
+        batch_size = options['batch_size']
+        start = {
+            model: next_pk(model)
+            for model in (User, Category, Genre, Title, TitleGenre,
+                          Review, Comment)
+        }
+        users = range(start[User], start[User] + options['users'])
+        categories = range(
+            start[Category], start[Category] + options['categories']
+        )
+        genres = range(start[Genre], start[Genre] + options['genres'])
+        titles = range(start[Title], start[Title] + options['titles'])
+
+        print('генерация данных:')
+        self.insert(User, (
+            User(pk=pk, username=f'bench{pk}', email=f'bench{pk}@yamdb.fake',
+                 password='!')
+            for pk in users
+        ), batch_size)
+        self.insert(Category, (
+            Category(pk=pk, name=f'Категория {pk}', slug=f'bench-c{pk}')
+            for pk in categories
+        ), batch_size)
+        self.insert(Genre, (
+            Genre(pk=pk, name=f'Жанр {pk}', slug=f'bench-g{pk}')
+            for pk in genres
+        ), batch_size)
+        self.insert(Title, (
+            Title(
+                pk=pk,
+                name=' '.join(rnd.choices(WORDS, k=3)).capitalize(),
+                year=rnd.randint(1950, 2023),
+                category_id=rnd.choice(categories),
+                description=' '.join(rnd.choices(WORDS, k=12))
+            )
+            for pk in titles
+        ), batch_size)
+        self.insert(TitleGenre, (
+            TitleGenre(title_id=title_id, genre_id=genre_id)
+            for title_id in titles
+            for genre_id in rnd.sample(genres, min(len(genres),
+                                                   rnd.randint(1, 3)))
+        ), batch_size)
+
+        # популярные произведения разбросаны по id случайно
+        ranked = list(titles)
+        rnd.shuffle(ranked)
+        counts = zipf_counts(
+            options['reviews'], len(ranked), options['zipf'], len(users)
+        )
+        review_pks = count(start[Review])
+        with explicit_dates(Review, Comment):
+            reviews = self.insert(Review, (
+                Review(
+                    pk=next(review_pks),
+                    title_id=title_id,
+                    author_id=author_id,
+                    text=' '.join(rnd.choices(WORDS, k=20)),
+                    score=rnd.choices(range(1, 11), SCORE_WEIGHTS)[0],
+                    pub_date=SEED_EPOCH + timedelta(
+                        minutes=rnd.randrange(PERIOD_MINUTES)
+                    )
+                )
+                for title_id, title_reviews in zip(ranked, counts)
+                for author_id in rnd.sample(users, title_reviews)
+            ), batch_size)
+            # первые отзывы комментируют чаще: индекс отзыва
+            # смещен к началу степенью zipf + 1
+            review_ids = range(start[Review], start[Review] + reviews)
+            if review_ids:
+                self.insert(Comment, (
+                    Comment(
+                        review_id=review_ids[int(
+                            len(review_ids)
+                            * rnd.random() ** (1 + options['zipf'])
+                        )],
+                        author_id=rnd.choice(users),
+                        text=' '.join(rnd.choices(WORDS, k=10)),
+                        pub_date=SEED_EPOCH + timedelta(
+                            minutes=rnd.randrange(PERIOD_MINUTES)
+                        )
+                    )
+                    for _ in range(options['comments'])
+                ), batch_size)
+
+        # первичные ключи заданы явно, последовательности нужно сдвинуть
+        with connection.cursor() as cursor:
+            for sql in connection.ops.sequence_reset_sql(
+                no_style(), list(start)
+            ):
+                cursor.execute(sql)
+        # bulk_create не вызывает сигналы
+        print('пересчет рейтингов и поискового индекса')
+        Title.objects.rebuild_rating()
+        Title.objects.rebuild_trending()
+        rebuild_index()
+        for model in start:
+            bump_version(model)
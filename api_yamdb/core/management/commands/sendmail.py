@@ -0,0 +1,54 @@
+import sys
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.outbox import outbox_stats, send_queued
+
+
+class Command(BaseCommand):
+    help = 'Отправка писем из очереди'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Работать постоянно, проверяя очередь каждые --interval сек'
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=5,
+            help='Пауза между проверками очереди, сек'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            help='Количество писем на одно соединение с почтовым сервером'
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            try:
+                self.send_all(options['batch_size'])
+            except Exception as error:
+                if not options['loop']:
+                    raise
+                # воркер переживает сбои БД и почтового сервера
+                print(f'ошибка отправки: {error!r}', file=sys.stderr)
+            if not options['loop']:
+                return
+            time.sleep(options['interval'])
+
+    def send_all(self, batch_size):
+        sent, failed = send_queued(batch_size)
+        # пока очередь не пуста, отправляем без пауз
+        while sent or failed:
+            stats = outbox_stats()
+            print(
+                f'отправлено {sent}, ошибок {failed}, '
+                f'в очереди {stats["pending"]}, '
+                f'доставка в среднем {stats["delivery_avg"]:.1f} с, '
+                f'максимум {stats["delivery_max"]:.1f} с'
+            )
+            sent, failed = send_queued(batch_size)
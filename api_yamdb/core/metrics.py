@@ -0,0 +1,212 @@
+"""
+Метрики HTTP запросов в текстовом формате Prometheus.
+
+Счетчики хранятся в памяти процесса. Для нескольких процессов
+(gunicorn с prefork) задается METRICS['MULTIPROCESS_DIR']: каждый
+процесс не чаще раза в FLUSH_INTERVAL сек и при завершении сохраняет
+свои значения в <pid>.json, а выдача метрик складывает файлы всех
+процессов. Каталог нужно очищать при перезапуске сервиса.
+"""
+import atexit
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter
+from pathlib import Path
+
+from django.conf import settings
+
+DEFAULTS = {
+    'ENABLED': False,
+    'BUCKETS': (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+    'MULTIPROCESS_DIR': None,
+    'FLUSH_INTERVAL': 1.0,
+}
+PREFIX = 'yamdb'
+
+
+def metrics_setting(name):
+    return getattr(settings, 'METRICS', {}).get(name, DEFAULTS[name])
+
+
+class MetricsCollector:
+    """Счетчики запросов, гистограммы длительности и запросы в работе."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.last_flush = 0.0
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.requests = Counter()
+            # (route, method) -> [количество по корзинам..., сумма]
+            self.durations = {}
+            self.in_flight = Counter()
+
+    def started(self, route):
+        with self.lock:
+            self.in_flight[route] += 1
+
+    def finished(self, route, method, status, duration):
+        buckets = metrics_setting('BUCKETS')
+        index = bisect_left(buckets, duration)
+        with self.lock:
+            self.in_flight[route] -= 1
+            self.requests[route, method, str(status)] += 1
+            values = self.durations.get((route, method))
+            if values is None:
+                values = self.durations[route, method] = [0] * (
+                    len(buckets) + 2
+                )
+            values[index] += 1
+            values[-1] += duration
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                'pid': os.getpid(),
+                'requests': [
+                    [*key, value] for key, value in self.requests.items()
+                ],
+                'durations': [
+                    [*key, values] for key, values in self.durations.items()
+                ],
+                'in_flight': [
+                    [route, value] for route, value in self.in_flight.items()
+                ],
+            }
+
+    def flush(self, force=False):
+        """Сохраняет значения процесса для многопроцессного режима."""
+        directory = metrics_setting('MULTIPROCESS_DIR')
+        if not directory:
+            return
+        now = time.monotonic()
+        if not force and now - self.last_flush < metrics_setting(
+            'FLUSH_INTERVAL'
+        ):
+            return
+        self.last_flush = now
+        path = Path(directory, f'{os.getpid()}.json')
+        temp = path.with_suffix('.tmp')
+        with open(temp, 'w', encoding='utf-8') as h_file:
+            json.dump(self.snapshot(), h_file)
+        os.replace(temp, path)
+
+
+collector = MetricsCollector()
+atexit.register(collector.flush, force=True)
+
+
+def process_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def merge(snapshots):
+    """
+    Складывает значения процессов. Запросы в работе учитываются
+    только у живых процессов.
+    """
+    requests = Counter()
+    durations = {}
+    in_flight = Counter()
+    for snapshot in snapshots:
+        for *key, value in snapshot['requests']:
+            requests[tuple(key)] += value
+        for route, method, values in snapshot['durations']:
+            total = durations.setdefault((route, method), [0] * len(values))
+            for index, value in enumerate(values):
+                total[index] += value
+        if process_alive(snapshot['pid']):
+            for route, value in snapshot['in_flight']:
+                in_flight[route] += value
+    return requests, durations, in_flight
+
+
+def collect():
+    """Значения текущего процесса или всех процессов из каталога."""
+    directory = metrics_setting('MULTIPROCESS_DIR')
+    if not directory:
+        return merge([collector.snapshot()])
+    collector.flush(force=True)
+    snapshots = []
+    for path in Path(directory).glob('*.json'):
+        try:
+            with open(path, encoding='utf-8') as h_file:
+                snapshots.append(json.load(h_file))
+        except (OSError, ValueError):
+            continue
+    return merge(snapshots)
+
+
+def labels(**values):
+    def escape(value):
+        return str(value).replace('\\', r'\\').replace(
+            '\n', r'\n'
+        ).replace('"', r'\"')
+
+    return '{' + ','.join(
+        f'{name}="{escape(value)}"' for name, value in values.items()
+    ) + '}'
+
+
+def render(gauges=None):
+    """
+    Метрики в текстовом формате Prometheus. gauges - дополнительные
+    значения: имя -> (описание, значение).
+    """
+    requests, durations, in_flight = collect()
+    buckets = metrics_setting('BUCKETS')
+    name = f'{PREFIX}_http_requests_total'
+    lines = [
+        f'# HELP {name} Количество обработанных запросов.',
+        f'# TYPE {name} counter',
+    ]
+    for (route, method, status), value in sorted(requests.items()):
+        lines.append(
+            f'{name}{labels(route=route, method=method, status=status)} '
+            f'{value}'
+        )
+    name = f'{PREFIX}_http_request_duration_seconds'
+    lines += [
+        f'# HELP {name} Длительность обработки запросов.',
+        f'# TYPE {name} histogram',
+    ]
+    for (route, method), values in sorted(durations.items()):
+        cumulative = 0
+        for bound, value in zip((*buckets, '+Inf'), values):
+            cumulative += value
+            lines.append(
+                f'{name}_bucket'
+                f'{labels(route=route, method=method, le=bound)} '
+                f'{cumulative}'
+            )
+        lines.append(
+            f'{name}_sum{labels(route=route, method=method)} {values[-1]}'
+        )
+        lines.append(
+            f'{name}_count{labels(route=route, method=method)} {cumulative}'
+        )
+    name = f'{PREFIX}_http_requests_in_flight'
+    lines += [
+        f'# HELP {name} Запросы в обработке.',
+        f'# TYPE {name} gauge',
+    ]
+    for route, value in sorted(in_flight.items()):
+        lines.append(f'{name}{labels(route=route)} {value}')
+    for gauge, (description, value) in (gauges or {}).items():
+        lines += [
+            f'# HELP {PREFIX}_{gauge} {description}',
+            f'# TYPE {PREFIX}_{gauge} gauge',
+            f'{PREFIX}_{gauge} {value}',
+        ]
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,221 @@
+"""
+Профилирование SQL по запросам и метрики запросов.
+
+QueryProfileMiddleware включается настройкой QUERY_PROFILE['ENABLED'].
+Для доли запросов SAMPLE_RATE через connection.execute_wrapper
+считаются число SQL запросов, их суммарное время и повторы одного
+и того же запроса (признак N+1), а также время сериализаторов.
+Результат отдается в заголовке Server-Timing и строкой JSON
+в лог core.profile.
+
+MetricsMiddleware включается настройкой METRICS['ENABLED'] и передает
+длительность, статус и маршрут запроса в core.metrics.
+"""
+import asyncio
+import json
+import logging
+import random
+import time
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+from .metrics import collector, metrics_setting
+
+DEFAULTS = {
+    'ENABLED': False,
+    # доля профилируемых запросов, от 0 до 1
+    'SAMPLE_RATE': 1.0,
+    # столько выполнений одного запроса считается повтором
+    'DUPLICATE_THRESHOLD': 2,
+    'HEADER': True,
+    'LOG': True,
+}
+
+logger = logging.getLogger('core.profile')
+current_profile = ContextVar('current_profile', default=None)
+
+
+def profile_setting(name):
+    return getattr(settings, 'QUERY_PROFILE', {}).get(name, DEFAULTS[name])
+
+
+class QueryProfile:
+    """Замеры одного запроса к API."""
+
+    def __init__(self):
+        self.queries = 0
+        self.sql_time = 0.0
+        self.serializer_time = 0.0
+        self.statements = Counter()
+        self._serializing = False
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.sql_time += time.perf_counter() - start
+            self.queries += 1
+            self.statements[sql] += 1
+
+    @contextmanager
+    def serializing(self):
+        """Время сериализации без вложенных вызовов."""
+        if self._serializing:
+            yield
+            return
+        self._serializing = True
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.serializer_time += time.perf_counter() - start
+            self._serializing = False
+
+    def duplicates(self):
+        threshold = profile_setting('DUPLICATE_THRESHOLD')
+        return {
+            sql: count for sql, count in self.statements.most_common()
+            if count >= threshold
+        }
+
+    def server_timing(self, total):
+        duplicates = self.duplicates()
+        return ', '.join((
+            f'sql;dur={self.sql_time * 1000:.2f};'
+            f'desc="{self.queries} queries, {len(duplicates)} duplicated"',
+            f'serializer;dur={self.serializer_time * 1000:.2f}',
+            f'total;dur={total * 1000:.2f}',
+        ))
+
+
+@contextmanager
+def profiled_queries(profile):
+    """
+    Учитывает в profile запросы соединений текущего потока. Обертка
+    ставится в каждом потоке, где выполняется запрос к API.
+    """
+    with ExitStack() as stack:
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(profile))
+        yield
+
+
+@lru_cache(maxsize=None)
+def profiled_serializer(serializer_class):
+    """Подкласс сериализатора, который учитывает время to_representation."""
+
+    class ProfiledSerializer(serializer_class):
+
+        def to_representation(self, instance):
+            profile = current_profile.get()
+            if profile is None:
+                return super().to_representation(instance)
+            with profile.serializing():
+                return super().to_representation(instance)
+
+    ProfiledSerializer.__name__ = serializer_class.__name__
+    ProfiledSerializer.__qualname__ = serializer_class.__qualname__
+    return ProfiledSerializer
+
+
+class QueryProfileMiddleware:
+
+    def __init__(self, get_response):
+        if not profile_setting('ENABLED'):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if random.random() >= profile_setting('SAMPLE_RATE'):
+            return self.get_response(request)
+        profile = QueryProfile()
+        token = current_profile.set(profile)
+        start = time.perf_counter()
+        try:
+            with profiled_queries(profile):
+                response = self.get_response(request)
+        finally:
+            current_profile.reset(token)
+        total = time.perf_counter() - start
+        if profile_setting('HEADER'):
+            response['Server-Timing'] = profile.server_timing(total)
+        if profile_setting('LOG'):
+            match = request.resolver_match
+            logger.info(json.dumps({
+                'method': request.method,
+                'path': request.path,
+                'route': match.route if match else None,
+                'status': response.status_code,
+                'queries': profile.queries,
+                'sql_ms': round(profile.sql_time * 1000, 2),
+                'serializer_ms': round(profile.serializer_time * 1000, 2),
+                'total_ms': round(total * 1000, 2),
+                'duplicates': profile.duplicates(),
+            }, ensure_ascii=False))
+        return response
+
+
+class MetricsMiddleware:
+    """
+    Считает запросы по имени маршрута (например, titles-list).
+    Запрос попадает в число обрабатываемых после определения маршрута.
+    Под ASGI работает асинхронно, без переходов в общий поток.
+    """
+    sync_capable = True
+    async_capable = True
+    unmatched = 'unmatched'
+
+    def __init__(self, get_response):
+        if not metrics_setting('ENABLED'):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.is_async = asyncio.iscoroutinefunction(get_response)
+        if self.is_async:
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+            self.process_view = self.process_view_async
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request.metrics_route = request.resolver_match.view_name
+        collector.started(request.metrics_route)
+
+    async def process_view_async(self, request, *args):
+        MetricsMiddleware.process_view(self, request, *args)
+
+    def finished(self, request, status, start):
+        route = getattr(request, 'metrics_route', None)
+        if route is None:
+            route = self.unmatched
+            collector.started(route)
+        collector.finished(
+            route, request.method, status, time.perf_counter() - start
+        )
+        collector.flush()
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.call_async(request)
+        start = time.perf_counter()
+        status = 500
+        try:
+            response = self.get_response(request)
+            status = response.status_code
+            return response
+        finally:
+            self.finished(request, status, start)
+
+    async def call_async(self, request):
+        start = time.perf_counter()
+        status = 500
+        try:
+            response = await self.get_response(request)
+            status = response.status_code
+            return response
+        finally:
+            self.finished(request, status, start)
@@ -0,0 +1,41 @@
+from django.db import models
+from django.utils import timezone
+
+from .constants import FIELD_LENGTH
+
+
+class OutgoingEmail(models.Model):
+    """Письмо в очереди на отправку."""
+    recipient = models.EmailField(
+        verbose_name='Получатель',
+        max_length=FIELD_LENGTH['EMAIL']
+    )
+    subject = models.CharField(
+        verbose_name='Тема',
+        max_length=FIELD_LENGTH['MAX_SIZE']
+    )
+    message = models.TextField(verbose_name='Текст')
+    from_email = models.EmailField(
+        verbose_name='Отправитель',
+        max_length=FIELD_LENGTH['EMAIL']
+    )
+    created = models.DateTimeField('Дата постановки', auto_now_add=True)
+    next_attempt = models.DateTimeField(
+        'Следующая попытка',
+        default=timezone.now
+    )
+    attempts = models.PositiveSmallIntegerField('Попыток', default=0)
+    sent = models.DateTimeField('Дата отправки', null=True, blank=True)
+    last_error = models.TextField('Последняя ошибка', blank=True)
+
+    class Meta:
+        ordering = ('next_attempt',)
+        verbose_name = 'Исходящее письмо'
+        verbose_name_plural = 'Исходящие письма'
+        indexes = [
+            models.Index(fields=['sent', 'next_attempt'],
+                         name='outbox_pending'),
+        ]
+
+    def __str__(self):
+        return f'{self.recipient}: {self.subject}'[:50]
@@ -0,0 +1,193 @@
+"""
+Очередь исходящих писем.
+
+Письмо сохраняется в таблицу OutgoingEmail и отправляется отдельно
+от запроса: фоновым потоком процесса или командой sendmail.
+Режим задается в settings.EMAIL_OUTBOX['WORKER']:
+thread - поток после фиксации транзакции, повторы неудачных писем
+запускает таймер процесса,
+command - только команда manage.py sendmail --loop,
+sync - сразу в запросе (для тестов и отладки).
+
+Письма отправляются вне транзакции: пачка помечается занятой
+на LEASE сек коротким UPDATE, а результаты записываются после
+отправки. Медленный почтовый сервер не держит блокировку БД.
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import connections, transaction
+from django.db.models import Min
+from django.utils import timezone
+
+from .models import OutgoingEmail
+
+DEFAULTS = {
+    'WORKER': 'thread',
+    'BATCH_SIZE': 50,
+    'MAX_ATTEMPTS': 5,
+    # задержка перед повтором, удваивается с каждой попыткой, сек
+    'RETRY_DELAY': 30,
+    # время на отправку пачки, после него письма снова доступны, сек
+    'LEASE': 300,
+}
+
+executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='outbox')
+retry_timer = None
+retry_lock = threading.Lock()
+
+
+def outbox_setting(name):
+    return getattr(settings, 'EMAIL_OUTBOX', {}).get(name, DEFAULTS[name])
+
+
+def queue_mail(subject, message, from_email, recipient):
+    """Ставит письмо в очередь и сразу возвращает управление."""
+    email = OutgoingEmail.objects.create(
+        subject=subject,
+        message=message,
+        from_email=from_email,
+        recipient=recipient
+    )
+    worker = outbox_setting('WORKER')
+    if worker == 'sync':
+        transaction.on_commit(send_queued)
+    elif worker == 'thread':
+        transaction.on_commit(lambda: executor.submit(send_queued_in_thread))
+    return email
+
+
+def pending():
+    return OutgoingEmail.objects.filter(
+        sent__isnull=True,
+        attempts__lt=outbox_setting('MAX_ATTEMPTS')
+    )
+
+
+def claim_batch(batch_size):
+    """Занимает готовые к отправке письма на LEASE сек."""
+    now = timezone.now()
+    with transaction.atomic():
+        batch = list(
+            pending().filter(
+                next_attempt__lte=now
+            ).select_for_update(skip_locked=True)[:batch_size]
+        )
+        OutgoingEmail.objects.filter(
+            pk__in=[email.pk for email in batch]
+        ).update(
+            next_attempt=now + timedelta(seconds=outbox_setting('LEASE'))
+        )
+    return batch
+
+
+def failed_attempt(email, error):
+    """Откладывает письмо после неудачной попытки отправки."""
+    email.last_error = str(error)
+    email.next_attempt = timezone.now() + timedelta(
+        seconds=outbox_setting('RETRY_DELAY') * 2 ** (email.attempts - 1)
+    )
+
+
+def send_queued(batch_size=None):
+    """
+    Отправляет готовые к отправке письма через одно соединение
+    с почтовым сервером. Возвращает количество отправленных
+    и неудачных писем. Если соединение не открылось, неудачной
+    считается попытка отправки всей пачки.
+    """
+    batch = claim_batch(batch_size or outbox_setting('BATCH_SIZE'))
+    sent = failed = 0
+    if not batch:
+        return sent, failed
+    for email in batch:
+        email.attempts += 1
+    connection = get_connection()
+    try:
+        connection.open()
+    except Exception as error:
+        for email in batch:
+            failed_attempt(email, error)
+        failed = len(batch)
+    else:
+        try:
+            for email in batch:
+                try:
+                    EmailMessage(
+                        subject=email.subject,
+                        body=email.message,
+                        from_email=email.from_email,
+                        to=(email.recipient,),
+                        connection=connection
+                    ).send()
+                except Exception as error:
+                    failed_attempt(email, error)
+                    failed += 1
+                else:
+                    email.sent = timezone.now()
+                    email.last_error = ''
+                    sent += 1
+        finally:
+            connection.close()
+    OutgoingEmail.objects.bulk_update(
+        batch, ('attempts', 'sent', 'next_attempt', 'last_error')
+    )
+    return sent, failed
+
+
+def schedule_retry():
+    """Запускает отправку к ближайшей повторной попытке."""
+    global retry_timer
+    next_attempt = pending().aggregate(
+        value=Min('next_attempt')
+    )['value']
+    with retry_lock:
+        if retry_timer is not None:
+            retry_timer.cancel()
+            retry_timer = None
+        if next_attempt is None:
+            return
+        retry_timer = threading.Timer(
+            max(0, (next_attempt - timezone.now()).total_seconds()),
+            executor.submit,
+            (send_queued_in_thread,)
+        )
+        retry_timer.daemon = True
+        retry_timer.start()
+
+
+def send_queued_in_thread():
+    # у потока свое соединение с БД, закрываем его сами
+    try:
+        while sum(send_queued()):
+            pass
+    finally:
+        try:
+            schedule_retry()
+        finally:
+            connections.close_all()
+
+
+def outbox_stats(window=1000):
+    """
+    Глубина очереди и время доставки (сек) по последним
+    window отправленным письмам.
+    """
+    delays = sorted(
+        (sent - created).total_seconds()
+        for created, sent in OutgoingEmail.objects.filter(
+            sent__isnull=False
+        ).order_by('-sent').values_list('created', 'sent')[:window]
+    )
+    return {
+        'pending': pending().count(),
+        'failed': OutgoingEmail.objects.filter(
+            sent__isnull=True,
+            attempts__gte=outbox_setting('MAX_ATTEMPTS')
+        ).count(),
+        'delivery_avg': sum(delays) / len(delays) if delays else 0,
+        'delivery_max': delays[-1] if delays else 0,
+    }
@@ -0,0 +1,42 @@
+"""
+Параметры рейтингов лидеров.
+
+Лучшие произведения сортируются по сглаженному (байесовскому) рейтингу:
+(PRIOR_COUNT * PRIOR_MEAN + сумма оценок) / (PRIOR_COUNT + число оценок),
+поэтому произведение с одной десяткой не обгоняет проверенные.
+
+Популярность - сумма весов отзывов, вес удваивается каждые
+TRENDING_HALF_LIFE секунд от эпохи TrendingEpoch. Это равносильно
+затуханию старых отзывов, но новый отзыв меняет сумму на свой вес,
+без пересчета остальных. Показатель степени ограничен
+TRENDING_MAX_EXPONENT, чтобы вес не выходил за диапазон float;
+manage.py rebuildrating переносит эпоху на текущий момент
+и пересчитывает популярность, его нужно запускать хотя бы раз
+за TRENDING_MAX_EXPONENT периодов полураспада и после смены параметров.
+"""
+from datetime import datetime
+
+from django.conf import settings
+
+DEFAULTS = {
+    'PRIOR_MEAN': 5.5,
+    'PRIOR_COUNT': 5,
+    'MIN_REVIEWS': 1,
+    'TRENDING_HALF_LIFE': 7 * 24 * 3600,
+    'TRENDING_MAX_EXPONENT': 512,
+    'SIZE': 10,
+    'CACHE_TIMEOUT': 600,
+}
+
+
+def leaderboard_setting(name):
+    return getattr(settings, 'LEADERBOARD', {}).get(name, DEFAULTS[name])
+
+
+def trend_weight(moment: datetime, epoch: datetime) -> float:
+    """Вес отзыва, опубликованного в moment, для популярности."""
+    exponent = (
+        (moment - epoch).total_seconds()
+        / leaderboard_setting('TRENDING_HALF_LIFE')
+    )
+    return 2.0 ** min(exponent, leaderboard_setting('TRENDING_MAX_EXPONENT'))
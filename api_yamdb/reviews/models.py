@@ -1,12 +1,19 @@
+from collections import Counter
+
 from django.core.validators import (MaxValueValidator, MinValueValidator,
                                     validate_slug)
-from django.db import models
-from django.db.models import UniqueConstraint
+from django.db import models, transaction
+from django.db.models import (Avg, Case, Count, F, FloatField, OuterRef,
+                              Subquery, Sum, UniqueConstraint, Value, When)
+from django.db.models.functions import Cast, Coalesce, NullIf
+from django.utils import timezone
 
 from core.constants import FIELD_LENGTH
 from core.validators import current_year
 from users.models import User
 
+from .leaderboard import leaderboard_setting, trend_weight
+
 
 class NameSlug(models.Model):
     """Базовый класс для жанра и категории"""
@@ -42,6 +49,150 @@ class Genre(NameSlug):
         verbose_name_plural = 'Жанры'
 
 
+SCORES = range(1, 11)
+
+
+def score_field(score: int) -> str:
+    """Поле Title с количеством оценок score."""
+    return f'score_{score}'
+
+
+def score_count(score: int) -> models.PositiveIntegerField:
+    """Поле гистограммы оценок Title."""
+    return models.PositiveIntegerField(
+        verbose_name=f'Количество оценок {score}',
+        default=0,
+        editable=False
+    )
+
+
+def bayes_rating(rating_sum, rating_count):
+    """Выражение сглаженного рейтинга, см. reviews/leaderboard.py."""
+    prior_count = leaderboard_setting('PRIOR_COUNT')
+    return (
+        (Cast(rating_sum, FloatField())
+         + prior_count * leaderboard_setting('PRIOR_MEAN'))
+        / (rating_count + prior_count)
+    )
+
+
+class TitleQuerySet(models.QuerySet):
+
+    def change_rating(self, added=(), removed=(), trend=0.0):
+        """
+        Атомарно учитывает добавленные и удаленные оценки в хранимых
+        агрегатах: сумме, количестве, гистограмме, среднем
+        и сглаженном рейтинге; trend - изменение популярности.
+        Средние пересчитываются в том же UPDATE из значений суммы
+        и количества до обновления (семантика SQLite и PostgreSQL),
+        поэтому гонок между отзывами не возникает.
+        """
+        histogram = Counter(added)
+        histogram.subtract(removed)
+        rating_sum = F('rating_sum') + sum(added) - sum(removed)
+        rating_count = F('rating_count') + len(added) - len(removed)
+        counters = {
+            score_field(score): F(score_field(score)) + delta
+            for score, delta in histogram.items() if delta
+        }
+        if trend:
+            # после удаления последней оценки сбрасывается и остаток
+            # округления популярности
+            counters['trending'] = Case(
+                When(rating_count=len(removed) - len(added),
+                     then=Value(0.0)),
+                default=F('trending') + trend
+            )
+        return self.update(
+            rating_sum=rating_sum,
+            rating_count=rating_count,
+            rating=(Cast(rating_sum, FloatField())
+                    / NullIf(rating_count, 0)),
+            bayes_rating=bayes_rating(rating_sum, rating_count),
+            **counters
+        )
+
+    def rebuild_rating(self):
+        """Пересчитывает агрегаты рейтинга по таблице отзывов."""
+        reviews = Review.objects.filter(
+            title=OuterRef('pk')
+        ).order_by().values('title')
+        count = self.update(
+            rating_sum=Coalesce(
+                Subquery(reviews.annotate(value=Sum('score')).values('value')),
+                0
+            ),
+            rating_count=Coalesce(
+                Subquery(reviews.annotate(value=Count('pk')).values('value')),
+                0
+            ),
+            rating=Subquery(
+                reviews.annotate(value=Avg('score')).values('value')
+            ),
+            **{
+                score_field(score): Coalesce(Subquery(
+                    reviews.filter(score=score).annotate(
+                        value=Count('pk')
+                    ).values('value')
+                ), 0)
+                for score in SCORES
+            }
+        )
+        # сглаженный рейтинг считается из уже обновленных агрегатов
+        self.update(bayes_rating=bayes_rating(
+            F('rating_sum'), F('rating_count')
+        ))
+        return count
+
+    @transaction.atomic
+    def rebuild_trending(self, rebase=False):
+        """
+        Пересчитывает популярность по датам отзывов. С rebase=True
+        эпоха переносится на текущий момент, поэтому вызывать так
+        нужно для всех произведений.
+        """
+        epoch = TrendingEpoch.current(rebase)
+        trending = Counter()
+        for title_id, pub_date in Review.objects.filter(
+            title__in=self
+        ).values_list('title_id', 'pub_date').iterator():
+            trending[title_id] += trend_weight(pub_date, epoch)
+        titles = list(self.only('pk'))
+        for title in titles:
+            title.trending = trending[title.pk]
+        self.model.objects.bulk_update(titles, ('trending',), 1000)
+        return len(titles)
+
+    def leaders(self):
+        """Лучшие произведения по сглаженному рейтингу."""
+        return self.filter(
+            rating_count__gte=leaderboard_setting('MIN_REVIEWS')
+        ).order_by('-bayes_rating', 'pk')
+
+    def trending(self):
+        """Произведения с отзывами, самые популярные первыми."""
+        return self.filter(trending__gt=0).order_by('-trending', 'pk')
+
+
+class TrendingEpoch(models.Model):
+    """Начало отсчета весов популярности, см. reviews/leaderboard.py."""
+    moment = models.DateTimeField(verbose_name='Начало отсчета')
+
+    class Meta:
+        verbose_name = 'Эпоха популярности'
+        verbose_name_plural = 'Эпохи популярности'
+
+    @classmethod
+    def current(cls, rebase=False):
+        """Текущая эпоха; rebase=True переносит ее на текущий момент."""
+        lookup = (
+            cls.objects.update_or_create if rebase
+            else cls.objects.get_or_create
+        )
+        epoch, _ = lookup(pk=1, defaults={'moment': timezone.now()})
+        return epoch.moment
+
+
 class Title(models.Model):
     """Произведение."""
     name = models.CharField(
@@ -73,15 +224,69 @@ class Title(models.Model):
         blank=True,
         related_name='titles',
     )
+    rating_sum = models.PositiveIntegerField(
+        verbose_name='Сумма оценок',
+        default=0,
+        editable=False
+    )
+    rating_count = models.PositiveIntegerField(
+        verbose_name='Количество оценок',
+        default=0,
+        editable=False
+    )
+    rating = models.FloatField(
+        verbose_name='Рейтинг',
+        null=True,
+        blank=True,
+        editable=False
+    )
+    bayes_rating = models.FloatField(
+        verbose_name='Сглаженный рейтинг',
+        null=True,
+        blank=True,
+        editable=False
+    )
+    trending = models.FloatField(
+        verbose_name='Популярность',
+        default=0,
+        editable=False
+    )
+    # гистограмма оценок
+    score_1 = score_count(1)
+    score_2 = score_count(2)
+    score_3 = score_count(3)
+    score_4 = score_count(4)
+    score_5 = score_count(5)
+    score_6 = score_count(6)
+    score_7 = score_count(7)
+    score_8 = score_count(8)
+    score_9 = score_count(9)
+    score_10 = score_count(10)
+
+    objects = TitleQuerySet.as_manager()
 
     class Meta:
         ordering = ('name',)
         verbose_name = 'Произведение'
         verbose_name_plural = 'Произведения'
+        indexes = [
+            # сортировка списка и keyset пагинация по (name, id)
+            models.Index(fields=['name', 'id'], name='title_name'),
+            models.Index(fields=['-bayes_rating'], name='title_leaders'),
+            models.Index(fields=['category', '-bayes_rating'],
+                         name='title_category_leaders'),
+            models.Index(fields=['-trending'], name='title_trending'),
+        ]
 
     def __str__(self) -> str:
         return self.name[:50]
 
+    @property
+    def score_histogram(self) -> dict:
+        return {
+            score: getattr(self, score_field(score)) for score in SCORES
+        }
+
 
 class TitleGenre(models.Model):
     """Жанр произведения."""
@@ -102,6 +307,11 @@ class TitleGenre(models.Model):
         constraints = [
             UniqueConstraint(fields=['title', 'genre'], name='unique genre')
         ]
+        # уникальное ограничение ведет от произведения к жанрам,
+        # фильтр ?genre= идет от жанра к произведениям
+        indexes = [
+            models.Index(fields=['genre', 'title'], name='titlegenre_genre'),
+        ]
         verbose_name = 'Произведение, Жанр'
 
 
@@ -143,6 +353,11 @@ class Review(TextAuthor):
             models.UniqueConstraint(fields=['author', 'title'],
                                     name='unique_review')
         ]
+        # отзывы произведения по дате и keyset пагинация по (pub_date, id)
+        indexes = [
+            models.Index(fields=['title', 'pub_date', 'id'],
+                         name='review_title_pub_date'),
+        ]
 
 
 class Comment(TextAuthor):
@@ -156,3 +371,7 @@ class Comment(TextAuthor):
         default_related_name = 'comments'
         verbose_name = 'Комментарий'
         verbose_name_plural = 'Комментарии'
+        indexes = [
+            models.Index(fields=['review', 'pub_date', 'id'],
+                         name='comment_review_pub_date'),
+        ]
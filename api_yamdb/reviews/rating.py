@@ -0,0 +1,49 @@
+"""
+Отложенный пересчет рейтингов.
+
+Удаление пользователя или произведения каскадом удаляет отзывы,
+и по каждому отзыву срабатывает post_delete. Внутри deferred_rating()
+обработчики только запоминают затронутые произведения и отзывы,
+а рейтинг каждого произведения пересчитывается один раз в конце.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.db import transaction
+
+from core.cache import bump_version
+
+from .models import Review, Title
+
+current_batch = ContextVar('current_batch', default=None)
+
+
+class RatingBatch:
+
+    def __init__(self):
+        self.titles = set()
+        self.reviews = set()
+
+
+@contextmanager
+def deferred_rating():
+    batch = current_batch.get()
+    if batch is not None:
+        yield batch
+        return
+    batch = RatingBatch()
+    token = current_batch.set(batch)
+    try:
+        with transaction.atomic():
+            yield batch
+            titles = Title.objects.filter(pk__in=batch.titles)
+            titles.rebuild_rating()
+            titles.rebuild_trending()
+    finally:
+        current_batch.reset(token)
+    if batch.titles:
+        bump_version(Title)
+    for pk in batch.titles:
+        bump_version(Title, pk)
+    for pk in batch.reviews:
+        bump_version(Review, pk)
@@ -0,0 +1,196 @@
+"""
+Полнотекстовый индекс по названию и описанию произведений.
+
+Индекс хранится в отдельной таблице: виртуальная FTS5 таблица в SQLite
+или таблица с tsvector и GIN индексом в PostgreSQL. Для остальных СУБД
+индекс не создается, и поиск выполняется через icontains. Так же
+поиск работает, если SQLite собран без FTS5 или таблица индекса
+недоступна: ошибки индекса не мешают сохранению произведений и migrate.
+"""
+import re
+from contextlib import contextmanager
+from functools import lru_cache
+
+from django.db import DatabaseError, connection, transaction
+
+from .models import Title
+
+TABLE = f'{Title._meta.db_table}_search'
+
+
+class SQLiteTitleIndex:
+    check_sql = "SELECT sqlite_compileoption_used('ENABLE_FTS5')"
+    create_sql = (
+        f'CREATE VIRTUAL TABLE IF NOT EXISTS {TABLE} '
+        "USING fts5(name, description, tokenize='unicode61')",
+    )
+    delete_sql = f'DELETE FROM {TABLE} WHERE rowid = %s'
+    insert_sql = (
+        f'INSERT INTO {TABLE} (rowid, name, description) '
+        'VALUES (%s, %s, %s)'
+    )
+    rebuild_sql = (
+        f'DELETE FROM {TABLE}',
+        f'INSERT INTO {TABLE} (rowid, name, description) '
+        f"SELECT id, name, COALESCE(description, '') "
+        f'FROM {Title._meta.db_table}',
+    )
+    # совпадения в названии весят больше, чем в описании
+    search_sql = (
+        f'SELECT rowid FROM {TABLE} WHERE {TABLE} MATCH %s '
+        f'ORDER BY bm25({TABLE}, 10.0, 1.0) LIMIT %s'
+    )
+
+    def update(self, cursor, title):
+        cursor.execute(self.delete_sql, [title.pk])
+        cursor.execute(
+            self.insert_sql,
+            [title.pk, title.name, title.description or '']
+        )
+
+    def query(self, words):
+        return ' '.join(f'"{word}"*' for word in words)
+
+
+class PostgreSQLTitleIndex:
+    check_sql = None
+    document = (
+        "setweight(to_tsvector('simple', {name}), 'A') || "
+        "setweight(to_tsvector('simple', COALESCE({description}, '')), 'B')"
+    )
+    create_sql = (
+        f'CREATE TABLE IF NOT EXISTS {TABLE} ('
+        'title_id bigint PRIMARY KEY, document tsvector NOT NULL)',
+        f'CREATE INDEX IF NOT EXISTS {TABLE}_document '
+        f'ON {TABLE} USING gin (document)',
+    )
+    delete_sql = f'DELETE FROM {TABLE} WHERE title_id = %s'
+    insert_sql = (
+        f'INSERT INTO {TABLE} (title_id, document) VALUES (%s, '
+        + document.format(name='%s', description='%s')
+        + ') ON CONFLICT (title_id) DO UPDATE SET document = EXCLUDED.document'
+    )
+    rebuild_sql = (
+        f'TRUNCATE {TABLE}',
+        f'INSERT INTO {TABLE} (title_id, document) SELECT id, '
+        + document.format(name='name', description='description')
+        + f' FROM {Title._meta.db_table}',
+    )
+    search_sql = (
+        f"SELECT title_id FROM {TABLE}, to_tsquery('simple', %s) query "
+        'WHERE document @@ query '
+        'ORDER BY ts_rank_cd(document, query) DESC LIMIT %s'
+    )
+
+    def update(self, cursor, title):
+        cursor.execute(
+            self.insert_sql,
+            [title.pk, title.name, title.description]
+        )
+
+    def query(self, words):
+        return ' & '.join(f'{word}:*' for word in words)
+
+
+BACKENDS = {
+    'sqlite': SQLiteTitleIndex,
+    'postgresql': PostgreSQLTitleIndex,
+}
+
+
+@lru_cache(maxsize=None)
+def index_supported(vendor):
+    """Проверяется один раз на процесс."""
+    check_sql = BACKENDS[vendor].check_sql
+    if check_sql is None:
+        return True
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(check_sql)
+            return bool(cursor.fetchone()[0])
+    except DatabaseError:
+        return False
+
+
+def get_index():
+    """Индекс для текущей СУБД или None, если он недоступен."""
+    backend = BACKENDS.get(connection.vendor)
+    if backend is None or not index_supported(connection.vendor):
+        return None
+    return backend()
+
+
+@contextmanager
+def index_cursor():
+    """
+    Курсор для запросов к индексу. Ошибка индекса откатывает только
+    точку сохранения, а не транзакцию запроса, и пробрасывается дальше.
+    """
+    with transaction.atomic(), connection.cursor() as cursor:
+        yield cursor
+
+
+def create_index(**kwargs):
+    """Создает таблицу индекса, вызывается после migrate."""
+    index = get_index()
+    if index is None:
+        return
+    try:
+        with index_cursor() as cursor:
+            for sql in index.create_sql:
+                cursor.execute(sql)
+    except DatabaseError:
+        # поиск останется на icontains
+        pass
+
+
+def index_title(title):
+    index = get_index()
+    if index is None:
+        return
+    try:
+        with index_cursor() as cursor:
+            index.update(cursor, title)
+    except DatabaseError:
+        pass
+
+
+def unindex_title(pk):
+    index = get_index()
+    if index is None:
+        return
+    try:
+        with index_cursor() as cursor:
+            cursor.execute(index.delete_sql, [pk])
+    except DatabaseError:
+        pass
+
+
+def rebuild_index():
+    index = get_index()
+    if index is None:
+        return
+    create_index()
+    with connection.cursor() as cursor:
+        for sql in index.rebuild_sql:
+            cursor.execute(sql)
+
+
+def search_titles(text, limit):
+    """
+    Id произведений, найденных по словам из text (по префиксу),
+    в порядке убывания релевантности. None - индекс недоступен.
+    """
+    index = get_index()
+    if index is None:
+        return None
+    words = re.findall(r'\w+', text.lower())
+    if not words:
+        return []
+    try:
+        with index_cursor() as cursor:
+            cursor.execute(index.search_sql, [index.query(words), limit])
+            return [row[0] for row in cursor.fetchall()]
+    except DatabaseError:
+        # например, таблица индекса не создана
+        return None
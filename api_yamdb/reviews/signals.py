@@ -0,0 +1,104 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from core.cache import bump_version
+from users.models import User
+from users.signals import changed_fields
+from .leaderboard import trend_weight
+from .models import (Category, Comment, Genre, Review, Title, TitleGenre,
+                     TrendingEpoch)
+from .rating import current_batch
+from .search import index_title, unindex_title
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=Genre)
+@receiver(post_delete, sender=Genre)
+def reference_changed(sender, **kwargs):
+    """Сбрасывает кеш списков категорий и жанров."""
+    bump_version(sender)
+
+
+@receiver(post_save, sender=Title)
+@receiver(post_delete, sender=Title)
+@receiver(post_save, sender=TitleGenre)
+@receiver(post_delete, sender=TitleGenre)
+def title_changed(sender, **kwargs):
+    """Меняет версию списка произведений."""
+    bump_version(Title)
+
+
+@receiver(post_save, sender=Title)
+def title_saved(sender, instance, raw=False, **kwargs):
+    """Обновляет полнотекстовый индекс произведения."""
+    if not raw:
+        index_title(instance)
+
+
+@receiver(post_delete, sender=Title)
+def title_deleted(sender, instance, **kwargs):
+    """Отзывы удаленного произведения больше недоступны."""
+    bump_version(Title, instance.pk)
+    unindex_title(instance.pk)
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, **kwargs):
+    """Имя автора выводится в отзывах и комментариях."""
+    if 'username' in changed_fields(instance):
+        bump_version(User)
+
+
+@receiver(post_delete, sender=User)
+def user_deleted(sender, **kwargs):
+    bump_version(User)
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def comment_changed(sender, instance, **kwargs):
+    """Меняет версию комментариев отзыва."""
+    batch = current_batch.get()
+    if batch is not None:
+        batch.reviews.add(instance.review_id)
+        return
+    bump_version(Review, instance.review_id)
+
+
+@receiver(post_save, sender=Review)
+def review_saved(sender, instance, created, raw=False, **kwargs):
+    """
+    Учитывает новую оценку в рейтинге произведения. При изменении
+    отзыва рейтинг пересчитывается по таблице: прочитанная раньше
+    оценка могла устареть из-за параллельного изменения.
+    """
+    if raw:
+        return
+    titles = Title.objects.filter(pk=instance.title_id)
+    if created:
+        titles.change_rating(
+            added=[instance.score],
+            trend=trend_weight(instance.pub_date, TrendingEpoch.current())
+        )
+    else:
+        titles.rebuild_rating()
+    bump_version(Title)
+    bump_version(Title, instance.title_id)
+
+
+@receiver(post_delete, sender=Review)
+def review_deleted(sender, instance, **kwargs):
+    """Исключает оценку удаленного отзыва из рейтинга произведения."""
+    batch = current_batch.get()
+    if batch is not None:
+        batch.titles.add(instance.title_id)
+        batch.reviews.add(instance.pk)
+        return
+    Title.objects.filter(pk=instance.title_id).change_rating(
+        removed=[instance.score],
+        trend=-trend_weight(instance.pub_date, TrendingEpoch.current())
+    )
+    bump_version(Title)
+    bump_version(Title, instance.title_id)
+    bump_version(Review, instance.pk)
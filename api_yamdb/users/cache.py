@@ -0,0 +1,55 @@
+"""
+Кеш облегченных копий пользователей для аутентификации по JWT.
+
+В копии хранятся только поля, нужные для проверки прав. Остальные
+поля модели отложены и при обращении догружаются из БД.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db import router
+
+from .models import User
+
+SNAPSHOT_FIELDS = (
+    'id', 'username', 'role', 'is_staff', 'is_superuser', 'is_active'
+)
+SNAPSHOT_KEY = 'user:snapshot:{pk}'
+
+
+def snapshot_key(pk) -> str:
+    return SNAPSHOT_KEY.format(pk=pk)
+
+
+def get_cached_user(pk):
+    """
+    Пользователь с загруженными полями SNAPSHOT_FIELDS.
+    При промахе кеша - один запрос к БД. None - пользователь не найден.
+    """
+    key = snapshot_key(pk)
+    data = cache.get(key)
+    if data is None:
+        data = User.objects.filter(pk=pk).values(*SNAPSHOT_FIELDS).first()
+        if data is None:
+            return None
+        cache.set(key, data, settings.USER_SNAPSHOT_TIMEOUT)
+    names = [
+        field.attname for field in User._meta.concrete_fields
+        if field.attname in data
+    ]
+    return User.from_db(
+        router.db_for_read(User), names, [data[name] for name in names]
+    )
+
+
+def forget_user(pk):
+    cache.delete(snapshot_key(pk))
+
+
+def model_user(user):
+    """
+    Экземпляр User для записи в FK: пользователь, собранный
+    из токена, заменяется копией из кеша. None - пользователь удален.
+    """
+    if isinstance(user, User):
+        return user
+    return get_cached_user(user.pk)
@@ -0,0 +1,50 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from core.cache import bump_version
+
+from .cache import forget_user
+from .models import User
+
+# поля, изменение которых проверяют обработчики post_save
+TRACKED_FIELDS = ('username', 'role', 'is_staff', 'is_superuser', 'is_active')
+# поля прав: их изменение делает устаревшими роли в токенах (api/tokens.py)
+ROLE_FIELDS = {'role', 'is_staff', 'is_superuser', 'is_active'}
+
+
+def changed_fields(user) -> set:
+    """Поля из TRACKED_FIELDS, измененные последним сохранением."""
+    return getattr(user, '_changed_fields', set())
+
+
+@receiver(pre_save, sender=User)
+def user_saving(sender, instance, raw=False, update_fields=None, **kwargs):
+    """Сравнивает TRACKED_FIELDS со значениями в БД одним запросом."""
+    instance._changed_fields = set()
+    if raw or instance._state.adding:
+        return
+    fields = [
+        name for name in TRACKED_FIELDS
+        if update_fields is None or name in update_fields
+    ]
+    if not fields:
+        return
+    stored = User.objects.filter(pk=instance.pk).values(*fields).first()
+    instance._changed_fields = {
+        name for name in fields
+        if stored is None or stored[name] != getattr(instance, name)
+    }
+
+
+@receiver(post_save, sender=User)
+def user_changed(sender, instance, **kwargs):
+    """Копия пользователя в кеше устаревает при любом изменении."""
+    forget_user(instance.pk)
+    if changed_fields(instance) & ROLE_FIELDS:
+        bump_version(User, instance.pk)
+
+
+@receiver(post_delete, sender=User)
+def user_deleted(sender, instance, **kwargs):
+    forget_user(instance.pk)
+    bump_version(User, instance.pk)
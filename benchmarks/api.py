@@ -0,0 +1,151 @@
+"""
+Нагрузочный бенчмарк API через настоящий URLconf.
+
+Запросы выполняются тестовым клиентом Django в том же процессе.
+По каждому адресу выводятся p50/p95/p99 и число SQL запросов,
+результаты сохраняются в JSON для сравнения запусков:
+    python -m benchmarks.api --output after.json --compare before.json
+
+По умолчанию данные генерируются командой seed_bench в тестовой БД.
+С --existing используется рабочая БД, заполненная заранее:
+    python api_yamdb/manage.py seed_bench
+    python -m benchmarks.api --existing
+"""
+import argparse
+import json
+import platform
+import time
+from contextlib import nullcontext
+
+from benchmarks.common import measure, report, test_database
+
+import django  # noqa: E402
+from django.core.cache import cache  # noqa: E402
+from django.core.management import call_command  # noqa: E402
+from django.db import connection, reset_queries  # noqa: E402
+from django.db.models import Count  # noqa: E402
+from django.test import Client  # noqa: E402
+from django.test.utils import CaptureQueriesContext  # noqa: E402
+
+from api.tokens import RoleAccessToken  # noqa: E402
+from reviews.models import Genre, Review, Title  # noqa: E402
+from users.models import User  # noqa: E402
+
+SEED_OPTIONS = ('users', 'titles', 'reviews', 'comments')
+
+
+def endpoints():
+    """Адреса для замера: самые нагруженные произведение и отзыв."""
+    title = Title.objects.order_by('-rating_count', 'pk').first()
+    review = Review.objects.filter(title=title).annotate(
+        comment_count=Count('comments')
+    ).order_by('-comment_count', 'pk').first()
+    genre = Genre.objects.order_by('pk').first()
+    titles = '/api/v1/titles/'
+    reviews = f'{titles}{title.pk}/reviews/'
+    comments = f'{reviews}{review.pk}/comments/'
+    return {
+        'titles': titles,
+        'titles_page_50': f'{titles}?page=50',
+        'titles_cursor': f'{titles}?pagination=cursor',
+        'titles_genre': f'{titles}?genre={genre.slug}',
+        'titles_search': f'{titles}?search={title.name.split()[0]}',
+        'title_detail': f'{titles}{title.pk}/',
+        'titles_top': f'{titles}top/',
+        'titles_trending': f'{titles}trending/',
+        'categories': '/api/v1/categories/',
+        'genres': '/api/v1/genres/',
+        'reviews': reviews,
+        'reviews_cursor': f'{reviews}?pagination=cursor',
+        'review_detail': f'{reviews}{review.pk}/',
+        'comments': comments,
+        'users_me': '/api/v1/users/me/',
+    }
+
+
+def run(repeat, cold):
+    user = User.objects.order_by('pk').first()
+    client = Client(
+        HTTP_AUTHORIZATION=f'Bearer {RoleAccessToken.for_user(user)}'
+    )
+    results = {}
+    for name, url in endpoints().items():
+        cache.clear()
+        # запрос очищает журнал SQL в начале, смещение должно быть нулевым
+        reset_queries()
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(url)
+        result = measure(
+            lambda: client.get(url), repeat,
+            setup=cache.clear if cold else None
+        )
+        result.update(
+            url=url, status=response.status_code, queries=len(context)
+        )
+        results[name] = result
+        report(f'{name} ({result["queries"]} SQL)', result)
+    return results
+
+
+def compare(results, path):
+    with open(path, encoding='utf-8') as h_file:
+        previous = json.load(h_file)['results']
+    print(f'\nсравнение p50 с {path}:')
+    for name, result in results.items():
+        if name in previous:
+            before = previous[name]
+            print(
+                f'{name:<20} {before["p50"]:8.3f} -> {result["p50"]:8.3f} мс '
+                f'({result["p50"] / before["p50"] - 1:+.0%}), '
+                f'SQL {before["queries"]} -> {result["queries"]}'
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--existing', action='store_true',
+                        help='замерять на рабочей БД без генерации данных')
+    parser.add_argument('--repeat', type=int, default=100)
+    parser.add_argument('--cold', action='store_true',
+                        help='очищать кеш Django перед каждым запросом')
+    parser.add_argument('--output', help='файл для результатов в JSON')
+    parser.add_argument('--compare', help='JSON прошлого запуска')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--users', type=int, default=5000)
+    parser.add_argument('--titles', type=int, default=2000)
+    parser.add_argument('--reviews', type=int, default=100000)
+    parser.add_argument('--comments', type=int, default=50000)
+    args = parser.parse_args()
+
+    with nullcontext() if args.existing else test_database():
+        if not args.existing:
+            call_command(
+                'seed_bench', seed=args.seed,
+                **{option: getattr(args, option) for option in SEED_OPTIONS}
+            )
+        meta = {
+            'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'database': connection.vendor,
+            'repeat': args.repeat,
+            'cold': args.cold,
+            'rows': {
+                'titles': Title.objects.count(),
+                'reviews': Review.objects.count(),
+                'users': User.objects.count(),
+            },
+        }
+        print(f'\nданные: {meta["rows"]}')
+        results = run(args.repeat, args.cold)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as h_file:
+            json.dump({'meta': meta, 'results': results}, h_file,
+                      indent=2, ensure_ascii=False)
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,151 @@
+"""
+Чтение под ASGI и под WSGI при одинаковой конкурентности.
+
+Каждый режим запускается в отдельном процессе на одинаковых данных
+seed_bench. WSGI моделирует сервер с пулом из --concurrency потоков
+(gunicorn --threads), ASGI - столько же одновременных запросов
+в одном цикле событий с асинхронным чтением (api/asyncread.py).
+Для каждого адреса выводятся пропускная способность, p50/p99
+и наибольшее число потоков процесса:
+    python -m benchmarks.asgi --concurrency 32 --requests 2000
+"""
+import argparse
+import asyncio
+import io
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.common import ROOT, percentile, test_database
+
+from django.conf import settings  # noqa: E402
+from django.core.management import call_command  # noqa: E402
+from django.test import AsyncClient, Client  # noqa: E402
+
+from benchmarks.api import endpoints  # noqa: E402
+
+NAMES = ('titles', 'title_detail', 'reviews', 'review_detail', 'comments')
+SEED = {'users': 500, 'titles': 500, 'reviews': 20000, 'comments': 10000}
+
+
+class ThreadPeak:
+    """Наибольшее число потоков процесса во время замера."""
+
+    def __init__(self):
+        self.peak = threading.active_count()
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self.watch, daemon=True)
+
+    def watch(self):
+        while not self.stopped.wait(0.005):
+            self.peak = max(self.peak, threading.active_count())
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *args):
+        self.stopped.set()
+        self.thread.join()
+
+
+def wsgi_timings(url, concurrency, requests):
+    local = threading.local()
+
+    def get(_):
+        if not hasattr(local, 'client'):
+            local.client = Client()
+        start = time.perf_counter()
+        local.client.get(url)
+        return (time.perf_counter() - start) * 1000
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        return list(pool.map(get, range(requests)))
+
+
+def asgi_timings(url, concurrency, requests):
+    async def worker(queue, timings):
+        client = AsyncClient()
+        while queue:
+            queue.pop()
+            start = time.perf_counter()
+            await client.get(url)
+            timings.append((time.perf_counter() - start) * 1000)
+
+    async def run():
+        queue = list(range(requests))
+        timings = []
+        await asyncio.gather(*(
+            worker(queue, timings) for _ in range(concurrency)
+        ))
+        return timings
+
+    return asyncio.run(run())
+
+
+def child(args):
+    mode = 'asgi' if settings.ASYNC_READ['ENABLED'] else 'wsgi'
+    timings = asgi_timings if mode == 'asgi' else wsgi_timings
+    results = {}
+    with test_database():
+        call_command(
+            'seed_bench', seed=args.seed, stdout=io.StringIO(), **SEED
+        )
+        urls = endpoints()
+        for name in NAMES:
+            # прогрев: соединения и кеши
+            timings(urls[name], args.concurrency, args.concurrency)
+            with ThreadPeak() as threads:
+                start = time.perf_counter()
+                values = timings(urls[name], args.concurrency, args.requests)
+                elapsed = time.perf_counter() - start
+            results[name] = {
+                'rps': len(values) / elapsed,
+                'p50': percentile(values, 50),
+                'p99': percentile(values, 99),
+                'threads': threads.peak,
+            }
+    print(json.dumps({'mode': mode, 'results': results}))
+
+
+def run_mode(mode, args):
+    env = {**os.environ, 'ASYNC_READ': '1' if mode == 'asgi' else '0'}
+    output = subprocess.run(
+        [sys.executable, '-m', 'benchmarks.asgi', '--child',
+         '--concurrency', str(args.concurrency),
+         '--requests', str(args.requests), '--seed', str(args.seed)],
+        cwd=ROOT, env=env, check=True, capture_output=True, text=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])['results']
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--child', action='store_true',
+                        help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        child(args)
+        return
+
+    results = {mode: run_mode(mode, args) for mode in ('wsgi', 'asgi')}
+    print(f'конкурентность {args.concurrency}, запросов {args.requests}')
+    for name in NAMES:
+        for mode in ('wsgi', 'asgi'):
+            result = results[mode][name]
+            print(
+                f'{name:<14} {mode}  {result["rps"]:7.0f} запр/с  '
+                f'p50 {result["p50"]:8.2f} мс  p99 {result["p99"]:8.2f} мс  '
+                f'потоков {result["threads"]}'
+            )
+
+
+if __name__ == '__main__':
+    main()
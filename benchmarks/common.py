@@ -0,0 +1,72 @@
+"""
+Общая обвязка бенчмарков: настройка Django, тестовая БД и замеры.
+
+Бенчмарки запускаются из корня репозитория:
+    python -m benchmarks.<имя>
+"""
+import logging
+import os
+import statistics
+import sys
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / 'api_yamdb'))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'api_yamdb.settings')
+
+import django  # noqa: E402
+
+django.setup()
+# ответы 4xx ожидаемы и не должны засорять вывод
+logging.getLogger('django.request').setLevel(logging.ERROR)
+
+from django.db import connection  # noqa: E402
+from django.test.utils import (setup_test_environment,  # noqa: E402
+                               teardown_test_environment)
+
+
+@contextmanager
+def test_database():
+    """Отдельная тестовая БД, рабочая не затрагивается."""
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0)
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
+
+
+def percentile(values, percent):
+    values = sorted(values)
+    index = min(len(values) - 1, round(percent / 100 * (len(values) - 1)))
+    return values[index]
+
+
+def measure(func, repeat, setup=None):
+    """
+    Время вызовов func в миллисекундах: p50, p95, p99 и среднее.
+    setup вызывается перед каждым вызовом и в замер не входит.
+    """
+    timings = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return {
+        'p50': percentile(timings, 50),
+        'p95': percentile(timings, 95),
+        'p99': percentile(timings, 99),
+        'mean': statistics.mean(timings),
+    }
+
+
+def report(name, result):
+    print(
+        f'{name:<40} p50 {result["p50"]:8.3f} мс  '
+        f'p95 {result["p95"]:8.3f} мс  p99 {result["p99"]:8.3f} мс'
+    )
@@ -0,0 +1,151 @@
+"""
+Составные индексы под запросы API.
+
+Заполняет тестовую БД, затем для каждого запроса выводит план
+(EXPLAIN) и время без индексов из Meta.indexes и с ними.
+    python -m benchmarks.indexes [--titles N] [--reviews N]
+"""
+import argparse
+import random
+from datetime import timedelta
+
+from benchmarks.common import measure, report, test_database
+
+from django.db import connection  # noqa: E402
+from django.utils import timezone  # noqa: E402
+
+from api.pagination import KeysetPagination, PubDatePagination  # noqa: E402
+from reviews.models import (Category, Comment, Genre, Review,  # noqa: E402
+                            Title, TitleGenre)
+from users.models import User  # noqa: E402
+
+MODELS = (Title, TitleGenre, Review, Comment)
+REPEAT = 200
+PAGE = 10
+
+
+def seed(titles, reviews, seed=1):
+    """Отзывы распределены по произведениям неравномерно (закон Ципфа)."""
+    rnd = random.Random(seed)
+    weights = [1 / rank for rank in range(1, titles + 1)]
+    scale = reviews / sum(weights)
+    # авторов хватает, чтобы самое популярное произведение
+    # получило все свои отзывы при уникальности (автор, произведение)
+    users = round(scale) + 1
+    User.objects.bulk_create(
+        User(username=f'user{n}', email=f'user{n}@yamdb.fake')
+        for n in range(users)
+    )
+    user_ids = list(User.objects.values_list('pk', flat=True))
+    category = Category.objects.create(name='Фильм', slug='film')
+    Genre.objects.bulk_create(
+        Genre(name=f'Жанр {n}', slug=f'genre{n}') for n in range(20)
+    )
+    Title.objects.bulk_create(
+        Title(name=f'Произведение {rnd.random():.12f}', year=2000,
+              category=category)
+        for _ in range(titles)
+    )
+    title_ids = list(Title.objects.values_list('pk', flat=True))
+    genre_ids = [genre.pk for genre in Genre.objects.all()]
+    TitleGenre.objects.bulk_create(
+        TitleGenre(title_id=title_id, genre_id=genre_id)
+        for title_id in title_ids
+        for genre_id in rnd.sample(genre_ids, 2)
+    )
+    start = timezone.now() - timedelta(days=365)
+    objs = []
+    for title_id, weight in zip(title_ids, weights):
+        count = min(len(user_ids), max(1, round(weight * scale)))
+        for author_id in rnd.sample(user_ids, count):
+            objs.append(Review(
+                title_id=title_id, author_id=author_id, text='Текст',
+                score=rnd.randint(1, 10)
+            ))
+    Review.objects.bulk_create(objs, batch_size=5000)
+    # auto_now_add не дает задать дату при вставке
+    objs = list(Review.objects.only('pk'))
+    for review in objs:
+        review.pub_date = start + timedelta(minutes=rnd.randrange(525600))
+    Review.objects.bulk_update(objs, ('pub_date',), batch_size=5000)
+    hot_review = Review.objects.filter(title_id=title_ids[0]).first()
+    Comment.objects.bulk_create(
+        (Comment(review=hot_review, author_id=rnd.choice(user_ids),
+                 text='Текст') for _ in range(reviews // 10)),
+        batch_size=5000
+    )
+    return title_ids[0], hot_review.pk, genre_ids[0]
+
+
+def api_queries(hot_title, hot_review, genre):
+    """Запросы в том виде, в каком их выполняют вьюсеты API."""
+    reviews = Review.objects.filter(title_id=hot_title)
+    middle = reviews.order_by('pub_date', 'id')[reviews.count() // 2]
+    keyset = KeysetPagination(PubDatePagination.keyset_ordering)
+    return {
+        'отзывы произведения, страница': reviews.order_by(
+            'pub_date', 'id'
+        )[:PAGE],
+        'отзывы произведения, keyset': reviews.filter(
+            keyset.keyset_filter(keyset.get_values(middle), reverse=False)
+        ).order_by('pub_date', 'id')[:PAGE],
+        'комментарии отзыва, страница': Comment.objects.filter(
+            review_id=hot_review
+        ).order_by('pub_date', 'id')[:PAGE],
+        'произведения по имени': Title.objects.order_by('name', 'id')[:PAGE],
+        'произведения жанра': Title.objects.filter(
+            genre=genre
+        ).order_by('name', 'id')[:PAGE],
+    }
+
+
+def set_indexes(enabled):
+    with connection.schema_editor() as editor:
+        for model in MODELS:
+            for index in model._meta.indexes:
+                if enabled:
+                    editor.add_index(model, index)
+                else:
+                    editor.remove_index(model, index)
+
+
+def run(queries, label):
+    print(f'\n=== {label} ===')
+    results = {}
+    for name, queryset in queries.items():
+        print(f'{name}:')
+        for line in queryset.explain().splitlines():
+            print(f'    {line}')
+        results[name] = measure(lambda: list(queryset.all()), REPEAT)
+    for name, result in results.items():
+        report(name, result)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--titles', type=int, default=5000)
+    parser.add_argument('--reviews', type=int, default=200000)
+    args = parser.parse_args()
+    with test_database():
+        hot_title, hot_review, genre = seed(args.titles, args.reviews)
+        print(
+            f'произведений {Title.objects.count()}, '
+            f'отзывов {Review.objects.count()}, '
+            f'комментариев {Comment.objects.count()}'
+        )
+        queries = api_queries(hot_title, hot_review, genre)
+        set_indexes(False)
+        before = run(queries, 'без составных индексов')
+        set_indexes(True)
+        after = run(queries, 'с составными индексами')
+        print()
+        for name in queries:
+            print(
+                f'{name:<40} ускорение p50 в '
+                f'{before[name]["p50"] / after[name]["p50"]:.1f} раза'
+            )
+
+
+if __name__ == '__main__':
+    main()
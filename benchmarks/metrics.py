@@ -0,0 +1,79 @@
+"""
+Накладные расходы сбора метрик на один запрос.
+
+Замеряет учет одного запроса в core.metrics (в памяти процесса
+и с записью файла для нескольких процессов), а также запрос к API
+с выключенными и включенными метриками. Завершается с ошибкой,
+если учет запроса дороже BUDGET_US микросекунд.
+"""
+import sys
+import tempfile
+
+from benchmarks.common import measure, report, test_database
+
+from django.test import Client, override_settings  # noqa: E402
+
+from core.metrics import collector  # noqa: E402
+from reviews.models import Category  # noqa: E402
+
+URL = '/api/v1/categories/'
+REPEAT = 2000
+BUDGET_US = 50
+
+
+def observe():
+    collector.started('categories-list')
+    collector.finished('categories-list', 'GET', 200, 0.003)
+    collector.flush()
+
+
+def request_time(enabled):
+    with override_settings(METRICS={'ENABLED': enabled}):
+        client = Client()
+        client.get(URL)
+        return measure(lambda: client.get(URL), REPEAT)
+
+
+def main():
+    # учет повторяется в пачке, чтобы таймер не искажал микросекунды
+    batch = 100
+    direct = {}
+    with override_settings(METRICS={'ENABLED': True}):
+        direct['в памяти процесса'] = measure(
+            lambda: [observe() for _ in range(batch)], REPEAT // 10
+        )
+    with tempfile.TemporaryDirectory() as directory:
+        with override_settings(METRICS={
+            'ENABLED': True, 'MULTIPROCESS_DIR': directory
+        }):
+            direct['несколько процессов'] = measure(
+                lambda: [observe() for _ in range(batch)], REPEAT // 10
+            )
+    for name, result in direct.items():
+        print(
+            f'учет запроса, {name:<22} p50 '
+            f'{result["p50"] * 1000 / batch:6.2f} мкс  p99 '
+            f'{result["p99"] * 1000 / batch:6.2f} мкс'
+        )
+    collector.reset()
+
+    with test_database():
+        Category.objects.create(name='Фильм', slug='film')
+        without = request_time(False)
+        report('запрос без метрик', without)
+        with_metrics = request_time(True)
+        report('запрос с метриками', with_metrics)
+        print(
+            'разница p50: '
+            f'{(with_metrics["p50"] - without["p50"]) * 1000:.1f} мкс'
+        )
+
+    worst = max(result['p50'] for result in direct.values()) * 1000 / batch
+    if worst > BUDGET_US:
+        print(f'превышен бюджет {BUDGET_US} мкс на запрос')
+        sys.exit(1)
+    print(f'в пределах бюджета {BUDGET_US} мкс на запрос')
+
+
+if __name__ == '__main__':
+    main()
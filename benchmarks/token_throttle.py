@@ -0,0 +1,54 @@
+"""
+Стоимость отказа при переборе кодов подтверждения.
+
+Сравнивает обработку неверного кода (поиск пользователя и проверка
+HMAC) с отказом по превышению лимита, который не обращается к БД.
+"""
+from benchmarks.common import measure, report, test_database
+
+from django.conf import settings  # noqa: E402
+from django.core.cache import cache  # noqa: E402
+from django.db import connection, reset_queries  # noqa: E402
+from django.test import Client, override_settings  # noqa: E402
+
+from users.models import User  # noqa: E402
+
+URL = '/api/v1/auth/token/'
+REPEAT = 2000
+
+
+def main():
+    with test_database():
+        User.objects.create_user(username='victim', email='v@yamdb.fake')
+        client = Client()
+        data = {'username': 'victim', 'confirmation_code': 'wrong'}
+
+        unlimited = {
+            'confirmation_ip': f'{REPEAT * 10}/min',
+            'confirmation_username': f'{REPEAT * 10}/min',
+        }
+        with override_settings(REST_FRAMEWORK={
+            **settings.REST_FRAMEWORK,
+            'DEFAULT_THROTTLE_RATES': unlimited,
+        }):
+            checked = measure(lambda: client.post(URL, data), REPEAT)
+        report('неверный код (БД + HMAC)', checked)
+
+        cache.clear()
+        for _ in range(10):
+            client.post(URL, data)
+        connection.force_debug_cursor = True
+        reset_queries()
+        rejected = measure(lambda: client.post(URL, data), REPEAT)
+        queries = len(connection.queries)
+        connection.force_debug_cursor = False
+        report('отказ по лимиту (429)', rejected)
+        print(f'запросов к БД при отказах: {queries}')
+        print(
+            'отказ дешевле проверки в '
+            f'{checked["p50"] / rejected["p50"]:.1f} раза'
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,10 @@
+import pytest
+from django.core.cache import cache
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    # БД очищается между тестами без сигналов, версии в кеше устаревают
+    cache.clear()
+    yield
+    cache.clear()
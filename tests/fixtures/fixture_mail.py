@@ -0,0 +1,7 @@
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def outbox_sync(settings):
+    # письма отправляются в запросе, чтобы проверять mail.outbox сразу
+    settings.EMAIL_OUTBOX = {**settings.EMAIL_OUTBOX, 'WORKER': 'sync'}
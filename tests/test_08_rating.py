@@ -0,0 +1,108 @@
+from http import HTTPStatus
+
+import pytest
+
+from tests.utils import create_reviews
+
+
+@pytest.mark.django_db(transaction=True)
+class Test08TitleRating:
+
+    def get_rating(self, client, title_id):
+        response = client.get(f'/api/v1/titles/{title_id}/')
+        assert response.status_code == HTTPStatus.OK
+        return response.json().get('rating')
+
+    def test_01_rating_follows_reviews(self, admin_client, admin, user,
+                                       user_client):
+        author_map = {admin: admin_client, user: user_client}
+        reviews, titles = create_reviews(admin_client, author_map)
+        title_id = titles[0]['id']
+        url = f'/api/v1/titles/{title_id}/reviews/'
+        assert self.get_rating(admin_client, title_id) == 5, (
+            'Проверьте, что рейтинг произведения учитывает новые отзывы.'
+        )
+
+        response = user_client.patch(
+            f'{url}{reviews[1]["id"]}/', data={'score': 9}
+        )
+        assert response.status_code == HTTPStatus.OK
+        assert self.get_rating(admin_client, title_id) == 7, (
+            'Проверьте, что рейтинг произведения пересчитывается при '
+            'изменении оценки отзыва.'
+        )
+
+        response = admin_client.delete(f'{url}{reviews[0]["id"]}/')
+        assert response.status_code == HTTPStatus.NO_CONTENT
+        assert self.get_rating(admin_client, title_id) == 9, (
+            'Проверьте, что рейтинг произведения пересчитывается при '
+            'удалении отзыва.'
+        )
+
+        response = user_client.delete(f'{url}{reviews[1]["id"]}/')
+        assert self.get_rating(admin_client, title_id) is None, (
+            'Проверьте, что у произведения без отзывов рейтинг равен `None`.'
+        )
+
+    def test_02_rebuild_rating(self, admin_client, admin, user, user_client):
+        from reviews.models import Title
+
+        author_map = {admin: admin_client, user: user_client}
+        _, titles = create_reviews(admin_client, author_map)
+        Title.objects.update(rating_sum=0, rating_count=0, rating=None)
+
+        Title.objects.rebuild_rating()
+        title = Title.objects.get(pk=titles[0]['id'])
+        assert (title.rating_sum, title.rating_count, title.rating) == (
+            10, 2, 5.0
+        ), 'Проверьте, что `rebuild_rating` пересчитывает агрегаты.'
+        title = Title.objects.get(pk=titles[1]['id'])
+        assert (title.rating_sum, title.rating_count, title.rating) == (
+            0, 0, None
+        ), 'Проверьте, что у произведения без отзывов агрегаты обнулены.'
+
+    def test_03_stale_score(self, user):
+        from reviews.models import Review, Title
+
+        title = Title.objects.create(name='Терминатор', year=1984)
+        Review.objects.create(title=title, author=user, text='text', score=5)
+        first = Review.objects.get()
+        second = Review.objects.get()
+        first.score = 7
+        first.save()
+        second.score = 9
+        second.save()
+        title.refresh_from_db()
+        assert (title.rating_sum, title.rating_count) == (9, 1), (
+            'Проверьте, что изменение отзыва по устаревшей копии '
+            'не искажает рейтинг произведения.'
+        )
+        assert title.score_histogram[9] == 1
+        assert title.score_histogram[5] == title.score_histogram[7] == 0
+
+    def test_04_delete_author(self, admin_client, admin, user,
+                              django_assert_max_num_queries):
+        from reviews.models import Review, Title
+
+        titles = [
+            Title.objects.create(name=f'Название {n}', year=2000)
+            for n in range(5)
+        ]
+        for title in titles:
+            Review.objects.create(
+                title=title, author=user, text='text', score=2
+            )
+            Review.objects.create(
+                title=title, author=admin, text='text', score=8
+            )
+        with django_assert_max_num_queries(30):
+            response = admin_client.delete(
+                f'/api/v1/users/{user.username}/'
+            )
+        assert response.status_code == HTTPStatus.NO_CONTENT
+        for title in Title.objects.all():
+            assert (title.rating_sum, title.rating_count) == (8, 1), (
+                'Проверьте, что при удалении автора рейтинг произведений '
+                'пересчитывается один раз для всех его отзывов.'
+            )
+            assert title.trending > 0
@@ -0,0 +1,47 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from reviews.models import Category, Genre, Title
+
+
+def create_bulk_titles(count, start=0):
+    category, _ = Category.objects.get_or_create(name='Фильм', slug='films')
+    genres = [
+        Genre.objects.get_or_create(name=f'Жанр {idx}', slug=f'genre-{idx}')[0]
+        for idx in range(2)
+    ]
+    for idx in range(start, start + count):
+        title = Title.objects.create(
+            name=f'Произведение {idx}', year=2000, category=category
+        )
+        title.genre.set(genres)
+
+
+def count_queries(client, url):
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url)
+    assert response.status_code == 200
+    return len(context)
+
+
+@pytest.mark.django_db(transaction=True)
+class Test09TitleQueries:
+
+    def test_01_title_list_queries_do_not_grow(self, client):
+        create_bulk_titles(1)
+        one_title = count_queries(client, '/api/v1/titles/')
+        create_bulk_titles(3, start=1)
+        full_page = count_queries(client, '/api/v1/titles/')
+        assert one_title == full_page, (
+            'Проверьте, что количество запросов к БД при получении списка '
+            'произведений не зависит от размера страницы.'
+        )
+
+    def test_02_title_detail_queries(self, client):
+        create_bulk_titles(1)
+        title = Title.objects.get()
+        assert count_queries(client, f'/api/v1/titles/{title.id}/') <= 2, (
+            'Проверьте, что произведение с жанрами и категорией '
+            'загружается не более чем двумя запросами.'
+        )
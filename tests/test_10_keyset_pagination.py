@@ -0,0 +1,91 @@
+import json
+from base64 import urlsafe_b64encode
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from reviews.models import Category, Review, Title
+
+
+def walk(client, url, link='next'):
+    pages = []
+    while url:
+        response = client.get(url)
+        assert response.status_code == HTTPStatus.OK
+        data = response.json()
+        assert 'count' not in data, (
+            'Проверьте, что при пагинации по курсору не считается '
+            'общее количество записей.'
+        )
+        pages.append(data['results'])
+        url = data[link]
+    return pages
+
+
+@pytest.mark.django_db(transaction=True)
+class Test10KeysetPagination:
+
+    def test_01_titles_cursor(self, client):
+        category = Category.objects.create(name='Фильм', slug='films')
+        for name in ('Б', 'А', 'Б', 'В', 'А', 'Б', 'Г'):
+            Title.objects.create(name=name, year=2000, category=category)
+        expected = list(
+            Title.objects.order_by('name', 'id').values_list('id', flat=True)
+        )
+
+        pages = walk(client, '/api/v1/titles/?pagination=cursor')
+        ids = [title['id'] for page in pages for title in page]
+        assert ids == expected, (
+            'Проверьте, что курсорная пагинация `/api/v1/titles/` обходит '
+            'все произведения по (name, id) без пропусков и повторов.'
+        )
+        assert len(pages) == 2
+
+        response = client.get('/api/v1/titles/?pagination=cursor')
+        last_page = walk(client, response.json()['next'])[-1]
+        assert [title['id'] for title in last_page] == expected[4:]
+        response = client.get(response.json()['next'])
+        previous = walk(client, response.json()['previous'], 'previous')
+        assert [title['id'] for page in previous for title in page] == (
+            expected[:4]
+        ), 'Проверьте, что ссылка `previous` возвращает предыдущую страницу.'
+
+    def test_02_reviews_cursor(self, client, admin, user, moderator):
+        title = Title.objects.create(name='Терминатор', year=1984)
+        for author in (admin, user, moderator):
+            Review.objects.create(
+                title=title, author=author, text='text', score=5
+            )
+        url = f'/api/v1/titles/{title.id}/reviews/?pagination=cursor'
+        with CaptureQueriesContext(connection) as context:
+            client.get(url)
+        assert not any(
+            'COUNT(' in query['sql'].upper() for query in context
+        ), 'Проверьте, что курсорная пагинация не выполняет COUNT(*).'
+        ids = [review['id'] for page in walk(client, url) for review in page]
+        assert ids == list(
+            title.reviews.order_by('pub_date', 'id').values_list(
+                'id', flat=True
+            )
+        )
+
+    def test_03_invalid_cursor(self, client):
+        response = client.get('/api/v1/titles/?cursor=broken')
+        assert response.status_code == HTTPStatus.NOT_FOUND
+        title = Title.objects.create(name='Терминатор', year=1984)
+        tampered = (
+            ('/api/v1/titles/', {'v': ['a', 'abc'], 'r': 0}),
+            ('/api/v1/titles/', {'v': ['a', {'x': 1}], 'r': 0}),
+            ('/api/v1/titles/', {'v': [None, 1], 'r': 0}),
+            ('/api/v1/titles/', {'v': ['a', 1, 2], 'r': 0}),
+            (f'/api/v1/titles/{title.id}/reviews/',
+             {'v': ['garbage', 1], 'r': 0}),
+        )
+        for url, data in tampered:
+            cursor = urlsafe_b64encode(json.dumps(data).encode()).decode()
+            response = client.get(url, {'cursor': cursor})
+            assert response.status_code == HTTPStatus.NOT_FOUND, (
+                f'Проверьте, что курсор {data} на `{url}` дает 404.'
+            )
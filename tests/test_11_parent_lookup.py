@@ -0,0 +1,59 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from reviews.models import Comment, Review, Title
+
+
+@pytest.mark.django_db(transaction=True)
+class Test11ParentLookup:
+
+    def test_01_comment_checks_title_chain(self, client, user_client, user):
+        title = Title.objects.create(name='Терминатор', year=1984)
+        other_title = Title.objects.create(name='Чужой', year=1979)
+        review = Review.objects.create(
+            title=title, author=user, text='text', score=5
+        )
+        url = f'/api/v1/titles/{other_title.id}/reviews/{review.id}/comments/'
+        assert client.get(url).status_code == HTTPStatus.NOT_FOUND, (
+            'Проверьте, что комментарии отзыва недоступны по адресу '
+            'чужого произведения.'
+        )
+        response = user_client.post(url, data={'text': 'comment'})
+        assert response.status_code == HTTPStatus.NOT_FOUND
+        assert not Comment.objects.exists()
+
+    def test_02_review_list_queries(self, client, admin, user, moderator):
+        title = Title.objects.create(name='Терминатор', year=1984)
+        url = f'/api/v1/titles/{title.id}/reviews/'
+        Review.objects.create(title=title, author=admin, text='t', score=5)
+        with CaptureQueriesContext(connection) as one_review:
+            client.get(url)
+        for author in (user, moderator):
+            Review.objects.create(
+                title=title, author=author, text='t', score=5
+            )
+        with CaptureQueriesContext(connection) as three_reviews:
+            client.get(url)
+        assert len(one_review) == len(three_reviews), (
+            'Проверьте, что авторы отзывов загружаются вместе с отзывами.'
+        )
+
+    def test_03_review_create_fetches_title_once(self, user_client):
+        title = Title.objects.create(name='Терминатор', year=1984)
+        with CaptureQueriesContext(connection) as context:
+            response = user_client.post(
+                f'/api/v1/titles/{title.id}/reviews/',
+                data={'text': 'text', 'score': 5}
+            )
+        assert response.status_code == HTTPStatus.CREATED
+        title_selects = [
+            query for query in context
+            if query['sql'].startswith('SELECT')
+            and 'FROM "reviews_title"' in query['sql']
+        ]
+        assert len(title_selects) == 1, (
+            'Проверьте, что произведение загружается один раз за запрос.'
+        )
@@ -0,0 +1,61 @@
+from http import HTTPStatus
+
+import pytest
+from django.core.cache import caches
+
+from reviews.models import Genre
+
+
+@pytest.fixture(params=('locmem', 'filebased'))
+def cache_backend(request, settings, tmp_path):
+    if request.param == 'filebased':
+        settings.CACHES = {
+            'default': {
+                'BACKEND': 'django.core.cache.backends.filebased.'
+                           'FileBasedCache',
+                'LOCATION': str(tmp_path),
+            }
+        }
+    caches['default'].clear()
+    return request.param
+
+
+@pytest.mark.django_db(transaction=True)
+class Test12ReferenceCache:
+
+    def test_01_category_list_cached(self, cache_backend, admin_client,
+                                     client, django_assert_num_queries):
+        url = '/api/v1/categories/'
+        admin_client.post(url, data={'name': 'Фильм', 'slug': 'films'})
+        first = client.get(url).json()
+        with django_assert_num_queries(0):
+            response = client.get(url)
+        assert response.json() == first, (
+            f'Проверьте, что повторный GET-запрос к `{url}` отдается '
+            'из кеша без запросов к БД.'
+        )
+
+        admin_client.post(url, data={'name': 'Книги', 'slug': 'books'})
+        assert client.get(url).json()['count'] == 2, (
+            'Проверьте, что создание категории сбрасывает кеш списка.'
+        )
+        admin_client.delete(f'{url}films/')
+        assert client.get(url).json()['count'] == 1, (
+            'Проверьте, что удаление категории сбрасывает кеш списка.'
+        )
+
+    def test_02_search_params_in_key(self, cache_backend, client):
+        url = '/api/v1/genres/'
+        Genre.objects.create(name='Ужасы', slug='horror')
+        Genre.objects.create(name='Комедия', slug='comedy')
+        assert client.get(url).json()['count'] == 2
+        response = client.get(url, {'search': 'Ужа'})
+        assert response.status_code == HTTPStatus.OK
+        assert response.json()['count'] == 1, (
+            'Проверьте, что параметры запроса входят в ключ кеша.'
+        )
+        Genre.objects.filter(slug='comedy').get().delete()
+        assert client.get(url).json()['count'] == 1, (
+            'Проверьте, что изменения вне вьюсета (например, через админку) '
+            'сбрасывают кеш списка.'
+        )
@@ -0,0 +1,122 @@
+from http import HTTPStatus
+
+import pytest
+from django.core.cache import cache
+
+from core.cache import version_key
+from reviews.models import Review, Title
+
+
+@pytest.mark.django_db(transaction=True)
+class Test13ConditionalGet:
+
+    def test_01_titles_etag(self, client, admin_client,
+                            django_assert_num_queries):
+        url = '/api/v1/titles/'
+        Title.objects.create(name='Терминатор', year=1984)
+        response = client.get(url)
+        etag = response['ETag']
+        assert etag and response.has_header('Last-Modified'), (
+            f'Проверьте, что ответ на GET-запрос к `{url}` содержит '
+            'заголовки `ETag` и `Last-Modified`.'
+        )
+        with django_assert_num_queries(0):
+            response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.NOT_MODIFIED, (
+            f'Проверьте, что GET-запрос к `{url}` с актуальным '
+            '`If-None-Match` получает ответ 304 без запросов к БД.'
+        )
+        Title.objects.create(name='Чужой', year=1979)
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.OK
+        assert response.json()['count'] == 2
+
+    def test_02_reviews_etag(self, client, user, admin):
+        title = Title.objects.create(name='Терминатор', year=1984)
+        other = Title.objects.create(name='Чужой', year=1979)
+        url = f'/api/v1/titles/{title.id}/reviews/'
+        review = Review.objects.create(
+            title=title, author=user, text='text', score=5
+        )
+        etag = client.get(url)['ETag']
+        Review.objects.create(title=other, author=user, text='text', score=5)
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.NOT_MODIFIED, (
+            'Проверьте, что отзывы на другое произведение не меняют '
+            '`ETag` списка отзывов.'
+        )
+        review.text = 'new text'
+        review.save()
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что изменение отзыва меняет `ETag` списка отзывов.'
+        )
+        comments_url = f'{url}{review.id}/comments/'
+        etag = client.get(comments_url)['ETag']
+        review.delete()
+        response = client.get(comments_url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.NOT_FOUND
+
+    def test_03_reviews_304_without_queries(self, client, user,
+                                            django_assert_num_queries):
+        title = Title.objects.create(name='Терминатор', year=1984)
+        review = Review.objects.create(
+            title=title, author=user, text='text', score=5
+        )
+        urls = (
+            f'/api/v1/titles/{title.id}/reviews/',
+            f'/api/v1/titles/{title.id}/reviews/{review.id}/comments/',
+        )
+        for url in urls:
+            etag = client.get(url)['ETag']
+            with django_assert_num_queries(0):
+                response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+            assert response.status_code == HTTPStatus.NOT_MODIFIED, (
+                f'Проверьте, что GET-запрос к `{url}` с актуальным '
+                '`If-None-Match` получает ответ 304 без запросов к БД.'
+            )
+
+    def test_04_author_changes(self, client, user, admin):
+        title = Title.objects.create(name='Терминатор', year=1984)
+        Review.objects.create(title=title, author=user, text='text', score=5)
+        url = f'/api/v1/titles/{title.id}/reviews/'
+        etag = client.get(url)['ETag']
+        admin.bio = 'new bio'
+        admin.save()
+        user.bio = 'new bio'
+        user.save()
+        client.post('/api/v1/auth/signup/', data={
+            'username': 'newcomer', 'email': 'newcomer@yamdb.fake'
+        })
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.NOT_MODIFIED, (
+            'Проверьте, что регистрация и изменение профиля без смены '
+            'имени не меняют `ETag` отзывов.'
+        )
+        user.username = 'renamed'
+        user.save()
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что смена имени автора меняет `ETag` отзывов.'
+        )
+        assert response.json()['results'][0]['author'] == 'renamed'
+
+    def test_05_missing_parent_not_cached(self, client):
+        title = Title.objects.create(name='Терминатор', year=1984)
+        missing = title.id + 1
+        for url, model, pk in (
+            (f'/api/v1/titles/{missing}/reviews/', Title, missing),
+            (f'/api/v1/titles/{title.id}/reviews/{missing}/comments/',
+             Review, missing),
+        ):
+            response = client.get(url)
+            assert response.status_code == HTTPStatus.NOT_FOUND
+            assert cache.get(version_key(model, pk)) is None, (
+                'Проверьте, что запрос к несуществующему объекту '
+                'не создает ключ версии в кеше.'
+            )
+        url = f'/api/v1/titles/{title.id}/reviews/'
+        cache.delete(version_key(Title, title.id))
+        etag = client.get(url)['ETag']
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.NOT_MODIFIED
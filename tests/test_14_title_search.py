@@ -0,0 +1,85 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+
+from reviews import search as search_module
+from reviews.models import Title
+from reviews.search import rebuild_index
+
+
+def search(client, text):
+    response = client.get('/api/v1/titles/', {'search': text})
+    assert response.status_code == HTTPStatus.OK
+    return [title['name'] for title in response.json()['results']]
+
+
+@pytest.mark.django_db(transaction=True)
+class Test14TitleSearch:
+
+    def test_01_search_ranked(self, client):
+        Title.objects.create(
+            name='Крестный отец', year=1972, description='Семья Корлеоне'
+        )
+        Title.objects.create(
+            name='Побег из Шоушенка', year=1994,
+            description='Банкир сбегает из тюрьмы'
+        )
+        Title.objects.create(
+            name='Тюрьма', year=2000, description='Документальный фильм'
+        )
+        assert search(client, 'тюрьм') == ['Тюрьма', 'Побег из Шоушенка'], (
+            'Проверьте, что поиск идет по названию и описанию, '
+            'а совпадения в названии выше в выдаче.'
+        )
+        assert search(client, 'корлеоне семья') == ['Крестный отец']
+        assert search(client, '"*') == []
+
+    def test_02_index_follows_changes(self, client):
+        title = Title.objects.create(name='Терминатор', year=1984)
+        assert search(client, 'терминатор') == ['Терминатор']
+        title.name = 'Чужой'
+        title.save()
+        assert search(client, 'терминатор') == []
+        assert search(client, 'чужой') == ['Чужой']
+        title.delete()
+        assert search(client, 'чужой') == [], (
+            'Проверьте, что удаленное произведение исключается из индекса.'
+        )
+
+    def test_03_rebuild_index(self, client):
+        Title.objects.bulk_create([
+            Title(name=f'Сиквел {number}', year=2000)
+            for number in range(3)
+        ])
+        assert search(client, 'сиквел') == []
+        rebuild_index()
+        assert len(search(client, 'сиквел')) == 3, (
+            'Проверьте, что пересоздание индекса учитывает все произведения.'
+        )
+
+    def test_04_without_fts(self, client, monkeypatch):
+        monkeypatch.setattr(search_module, 'index_supported',
+                            lambda vendor: False)
+        search_module.create_index()
+        title = Title.objects.create(name='Терминатор', year=1984)
+        assert search(client, 'Термин') == ['Терминатор'], (
+            'Проверьте, что без полнотекстового индекса поиск идет '
+            'через icontains.'
+        )
+        title.delete()
+
+    def test_05_missing_index_table(self, client):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DROP TABLE {search_module.TABLE}')
+        try:
+            title = Title.objects.create(name='Терминатор', year=1984)
+            title.name = 'Чужой'
+            title.save()
+            assert search(client, 'Чуж') == ['Чужой'], (
+                'Проверьте, что без таблицы индекса сохранение '
+                'произведений и поиск работают.'
+            )
+            title.delete()
+        finally:
+            search_module.create_index()
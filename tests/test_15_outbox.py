@@ -0,0 +1,177 @@
+import time
+from datetime import timedelta
+from http import HTTPStatus
+
+import pytest
+from django.core import mail
+from django.core.mail import EmailMessage
+from django.core.mail.backends import locmem
+from django.core.management import call_command
+from django.db import transaction
+from django.utils import timezone
+
+from core.management.commands import sendmail
+from core.models import OutgoingEmail
+from core import outbox
+from core.outbox import outbox_stats, pending, send_queued
+
+
+def wait_for_mail():
+    """Ждет письмо и завершения работы потока отправки."""
+    deadline = time.monotonic() + 5
+    while not mail.outbox and time.monotonic() < deadline:
+        time.sleep(0.05)
+    # поток пишет результаты после отправки, дожидаемся его
+    outbox.executor.submit(lambda: None).result()
+
+
+@pytest.fixture
+def outbox_command(settings):
+    settings.EMAIL_OUTBOX = {**settings.EMAIL_OUTBOX, 'WORKER': 'command'}
+
+
+@pytest.mark.django_db(transaction=True)
+class Test15Outbox:
+    url_signup = '/api/v1/auth/signup/'
+
+    def test_01_signup_queues_mail(self, client, outbox_command):
+        data = {'email': 'valid@yamdb.fake', 'username': 'valid_username'}
+        response = client.post(self.url_signup, data=data)
+        assert response.status_code == HTTPStatus.OK
+        assert len(mail.outbox) == 0, (
+            'Проверьте, что регистрация не ждет отправки письма.'
+        )
+        assert outbox_stats()['pending'] == 1
+
+        assert send_queued() == (1, 0)
+        assert mail.outbox[0].to == [data['email']]
+        assert outbox_stats()['pending'] == 0
+        assert send_queued() == (0, 0)
+
+    def test_02_failed_mail_retried(self, client, outbox_command,
+                                    monkeypatch):
+        data = {'email': 'valid@yamdb.fake', 'username': 'valid_username'}
+        client.post(self.url_signup, data=data)
+
+        def broken_send(self, fail_silently=False):
+            raise ConnectionError('SMTP недоступен')
+
+        with monkeypatch.context() as patch:
+            patch.setattr(EmailMessage, 'send', broken_send)
+            assert send_queued() == (0, 1)
+        email = OutgoingEmail.objects.get()
+        assert email.attempts == 1 and 'SMTP' in email.last_error
+        assert send_queued() == (0, 0), (
+            'Проверьте, что повтор откладывается на RETRY_DELAY.'
+        )
+
+        OutgoingEmail.objects.update(next_attempt=email.created)
+        assert send_queued() == (1, 0)
+        assert len(mail.outbox) == 1
+
+    def test_03_send_outside_transaction(self, client, outbox_command,
+                                         monkeypatch):
+        client.post(self.url_signup, data={
+            'email': 'valid@yamdb.fake', 'username': 'valid_username'
+        })
+        states = []
+        send = EmailMessage.send
+
+        def checked_send(self, fail_silently=False):
+            states.append((
+                transaction.get_connection().in_atomic_block,
+                pending().filter(next_attempt__lte=timezone.now()).exists()
+            ))
+            return send(self, fail_silently)
+
+        monkeypatch.setattr(EmailMessage, 'send', checked_send)
+        assert send_queued() == (1, 0)
+        assert states == [(False, False)], (
+            'Проверьте, что письма отправляются вне транзакции, '
+            'а пачка на время отправки занята.'
+        )
+
+    def test_04_thread_retry(self, client, settings, monkeypatch):
+        settings.EMAIL_OUTBOX = {
+            **settings.EMAIL_OUTBOX, 'WORKER': 'thread', 'RETRY_DELAY': 0.1
+        }
+        send = EmailMessage.send
+        calls = []
+
+        def flaky_send(self, fail_silently=False):
+            calls.append(self.to)
+            if len(calls) == 1:
+                raise ConnectionError('SMTP недоступен')
+            return send(self, fail_silently)
+
+        monkeypatch.setattr(EmailMessage, 'send', flaky_send)
+        client.post(self.url_signup, data={
+            'email': 'valid@yamdb.fake', 'username': 'valid_username'
+        })
+        wait_for_mail()
+        assert len(mail.outbox) == 1 and len(calls) == 2, (
+            'Проверьте, что в режиме thread неудачное письмо '
+            'отправляется повторно без новых регистраций.'
+        )
+
+    def test_05_connection_refused(self, client, settings, monkeypatch,
+                                   capsys):
+        settings.EMAIL_OUTBOX = {
+            **settings.EMAIL_OUTBOX, 'WORKER': 'thread', 'RETRY_DELAY': 0.2
+        }
+        settings.EMAIL_BACKEND = 'tests.test_15_outbox.RefusingBackend'
+        client.post(self.url_signup, data={
+            'email': 'valid@yamdb.fake', 'username': 'valid_username'
+        })
+        deadline = time.monotonic() + 5
+        while (not OutgoingEmail.objects.filter(attempts=1).exists()
+               and time.monotonic() < deadline):
+            time.sleep(0.05)
+        email = OutgoingEmail.objects.get()
+        assert email.attempts == 1 and 'SMTP' in email.last_error, (
+            'Проверьте, что ошибка соединения с почтовым сервером '
+            'засчитывается как неудачная попытка.'
+        )
+        assert email.next_attempt > timezone.now() - timedelta(seconds=1)
+
+        settings.EMAIL_BACKEND = (
+            'django.core.mail.backends.locmem.EmailBackend'
+        )
+        wait_for_mail()
+        assert len(mail.outbox) == 1, (
+            'Проверьте, что после ошибки соединения письмо '
+            'отправляется повторно без новых регистраций.'
+        )
+
+    def test_06_loop_survives_errors(self, outbox_command, monkeypatch,
+                                     capsys):
+        calls = []
+
+        def flaky_send_queued(batch_size=None):
+            calls.append(batch_size)
+            if len(calls) == 1:
+                raise ConnectionRefusedError('SMTP недоступен')
+            return 0, 0
+
+        def sleep(seconds):
+            if len(calls) > 1:
+                raise StopIteration
+
+        monkeypatch.setattr(sendmail, 'send_queued', flaky_send_queued)
+        monkeypatch.setattr(sendmail.time, 'sleep', sleep)
+        with pytest.raises(StopIteration):
+            call_command('sendmail', '--loop')
+        assert len(calls) == 2, (
+            'Проверьте, что `sendmail --loop` продолжает работу после '
+            'ошибки отправки.'
+        )
+        assert 'SMTP' in capsys.readouterr().err
+        with pytest.raises(ConnectionRefusedError):
+            calls.clear()
+            call_command('sendmail')
+
+
+class RefusingBackend(locmem.EmailBackend):
+
+    def open(self):
+        raise ConnectionRefusedError('SMTP недоступен')
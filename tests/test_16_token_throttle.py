@@ -0,0 +1,51 @@
+from http import HTTPStatus
+
+import pytest
+
+
+@pytest.mark.django_db(transaction=True)
+class Test16TokenThrottle:
+    url_token = '/api/v1/auth/token/'
+
+    def test_01_username_bucket(self, client, user,
+                                django_assert_num_queries):
+        data = {'username': user.username, 'confirmation_code': 'wrong'}
+        for _ in range(5):
+            response = client.post(self.url_token, data=data)
+            assert response.status_code == HTTPStatus.BAD_REQUEST
+        with django_assert_num_queries(0):
+            response = client.post(self.url_token, data=data)
+        assert response.status_code == HTTPStatus.TOO_MANY_REQUESTS, (
+            f'Проверьте, что попытки подобрать код на `{self.url_token}` '
+            'для одного пользователя ограничены и отклоняются без '
+            'запросов к БД.'
+        )
+        assert response.has_header('Retry-After')
+
+        data['username'] = user.username.upper()
+        response = client.post(self.url_token, data=data)
+        assert response.status_code == HTTPStatus.TOO_MANY_REQUESTS
+
+    def test_02_ip_bucket(self, client):
+        for number in range(30):
+            data = {'username': f'user{number}', 'confirmation_code': 'x'}
+            response = client.post(self.url_token, data=data)
+            assert response.status_code == HTTPStatus.NOT_FOUND
+        data = {'username': 'other', 'confirmation_code': 'x'}
+        response = client.post(self.url_token, data=data)
+        assert response.status_code == HTTPStatus.TOO_MANY_REQUESTS, (
+            f'Проверьте, что запросы к `{self.url_token}` с одного IP '
+            'ограничены.'
+        )
+
+    def test_03_forwarded_for_ignored(self, client):
+        for number in range(31):
+            data = {'username': f'user{number}', 'confirmation_code': 'x'}
+            response = client.post(
+                self.url_token, data=data,
+                HTTP_X_FORWARDED_FOR=f'10.0.0.{number}'
+            )
+        assert response.status_code == HTTPStatus.TOO_MANY_REQUESTS, (
+            'Проверьте, что подмена заголовка `X-Forwarded-For` не '
+            'обходит ограничение по IP.'
+        )
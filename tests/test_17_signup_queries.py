@@ -0,0 +1,59 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from api.serializers import UserCreateSerializer
+
+
+@pytest.mark.django_db(transaction=True)
+class Test17SignupQueries:
+    url_signup = '/api/v1/auth/signup/'
+
+    def signup_selects(self, client, data):
+        with CaptureQueriesContext(connection) as context:
+            response = client.post(self.url_signup, data=data)
+        selects = [
+            query for query in context
+            if query['sql'].startswith('SELECT')
+            and 'FROM "users_user"' in query['sql']
+        ]
+        return response, len(selects)
+
+    def test_01_single_lookup(self, client):
+        data = {'email': 'valid@yamdb.fake', 'username': 'valid_username'}
+        response, selects = self.signup_selects(client, data)
+        assert response.status_code == HTTPStatus.OK
+        assert selects == 1, (
+            'Проверьте, что регистрация проверяет username и email '
+            'одним запросом.'
+        )
+        response, selects = self.signup_selects(client, data)
+        assert response.status_code == HTTPStatus.OK
+        assert selects == 1, (
+            'Проверьте, что повторная регистрация выполняется одним запросом.'
+        )
+
+    def test_02_conflicts(self, client, user):
+        response, _ = self.signup_selects(
+            client, {'email': 'other@yamdb.fake', 'username': user.username}
+        )
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+        assert 'username' in str(response.json())
+        response, _ = self.signup_selects(
+            client, {'email': user.email, 'username': 'other'}
+        )
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+        assert 'email' in str(response.json())
+
+    def test_03_concurrent_signup(self, user):
+        data = {'email': user.email, 'username': user.username}
+        serializer = UserCreateSerializer(data=data)
+        serializer.is_valid(raise_exception=True)
+        # другой запрос успел создать пользователя после проверки
+        serializer.user = None
+        assert serializer.save() == user, (
+            'Проверьте, что гонка регистраций разрешается через '
+            'уникальные ограничения БД.'
+        )
@@ -0,0 +1,70 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+@pytest.mark.django_db(transaction=True)
+class Test18AuthCache:
+    url_titles = '/api/v1/titles/'
+    url_categories = '/api/v1/categories/'
+    url_me = '/api/v1/users/me/'
+
+    def user_selects(self, client, url):
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(url)
+        selects = [
+            query for query in context
+            if 'FROM "users_user"' in query['sql']
+        ]
+        return response, len(selects)
+
+    def test_01_no_user_query(self, user_client):
+        response, selects = self.user_selects(user_client, self.url_titles)
+        assert response.status_code == HTTPStatus.OK
+        assert selects == 1
+        response, selects = self.user_selects(user_client, self.url_titles)
+        assert response.status_code == HTTPStatus.OK
+        assert selects == 0, (
+            'Проверьте, что аутентифицированный запрос берет пользователя '
+            'из кеша, не обращаясь к таблице пользователей.'
+        )
+
+    def test_02_role_change(self, admin_client, user_client, user):
+        data = {'name': 'Фильм', 'slug': 'film'}
+        response = user_client.post(self.url_categories, data=data)
+        assert response.status_code == HTTPStatus.FORBIDDEN
+
+        response = admin_client.patch(
+            f'/api/v1/users/{user.username}/', data={'role': 'admin'}
+        )
+        assert response.status_code == HTTPStatus.OK
+        response = user_client.post(self.url_categories, data=data)
+        assert response.status_code == HTTPStatus.CREATED, (
+            'Проверьте, что изменение роли через `/api/v1/users/{username}/` '
+            'сбрасывает закешированную копию пользователя.'
+        )
+
+    def test_03_me(self, user_client, user):
+        user_client.get(self.url_titles)
+        response = user_client.get(self.url_me)
+        assert response.status_code == HTTPStatus.OK
+        assert response.json()['email'] == user.email
+        assert response.json()['bio'] == user.bio
+
+        response = user_client.patch(self.url_me, data={'bio': 'новое'})
+        assert response.status_code == HTTPStatus.OK
+        user.refresh_from_db()
+        assert user.bio == 'новое'
+        assert user.email == 'testuser@yamdb.fake', (
+            'Проверьте, что изменение `/api/v1/users/me/` не затирает '
+            'поля, которых нет в закешированной копии пользователя.'
+        )
+
+    def test_04_deleted_user(self, admin_client, user_client, user):
+        user_client.get(self.url_titles)
+        response = admin_client.delete(f'/api/v1/users/{user.username}/')
+        assert response.status_code == HTTPStatus.NO_CONTENT
+        response = user_client.get(self.url_titles)
+        assert response.status_code == HTTPStatus.UNAUTHORIZED
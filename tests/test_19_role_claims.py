@@ -0,0 +1,136 @@
+from http import HTTPStatus
+
+import pytest
+from django.contrib.auth.tokens import default_token_generator
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from reviews.models import Category, Title
+
+
+def token_client(client, user):
+    response = client.post('/api/v1/auth/token/', data={
+        'username': user.username,
+        'confirmation_code': default_token_generator.make_token(user)
+    })
+    assert response.status_code == HTTPStatus.OK
+    token = response.json()['token']
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+    return client, AccessToken(token)
+
+
+@pytest.mark.django_db(transaction=True)
+class Test19RoleClaims:
+    url_categories = '/api/v1/categories/'
+
+    def test_01_claims(self, client, admin):
+        admin_client, token = token_client(client, admin)
+        assert token['role'] == 'admin', (
+            'Проверьте, что `/api/v1/auth/token/` выдает токен с ролью '
+            'пользователя.'
+        )
+        assert token['username'] == admin.username
+        with CaptureQueriesContext(connection) as context:
+            response = admin_client.post(
+                self.url_categories, data={'name': 'Фильм', 'slug': 'film'}
+            )
+        assert response.status_code == HTTPStatus.CREATED
+        assert not [
+            query for query in context
+            if 'FROM "users_user"' in query['sql']
+        ], (
+            'Проверьте, что права проверяются по ролям из токена '
+            'без запросов к таблице пользователей.'
+        )
+
+    def test_02_author(self, client, user, moderator):
+        category = Category.objects.create(name='Фильм', slug='film')
+        title = Title.objects.create(name='Название', year=2000,
+                                     category=category)
+        user_client, _ = token_client(client, user)
+        url = f'/api/v1/titles/{title.id}/reviews/'
+        response = user_client.post(url, data={'text': 'Текст', 'score': 5})
+        assert response.status_code == HTTPStatus.CREATED
+        assert response.json()['author'] == user.username
+        response = user_client.post(url, data={'text': 'Текст', 'score': 5})
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+
+        review_url = f'{url}{title.reviews.get().id}/'
+        moderator_client, _ = token_client(client, moderator)
+        response = moderator_client.delete(review_url)
+        assert response.status_code == HTTPStatus.NO_CONTENT
+
+    def test_03_role_change_reload(self, client, admin_client, user):
+        user_client, _ = token_client(client, user)
+        data = {'name': 'Фильм', 'slug': 'film'}
+        response = user_client.post(self.url_categories, data=data)
+        assert response.status_code == HTTPStatus.FORBIDDEN
+        admin_client.patch(
+            f'/api/v1/users/{user.username}/', data={'role': 'admin'}
+        )
+        response = user_client.post(self.url_categories, data=data)
+        assert response.status_code == HTTPStatus.CREATED, (
+            'Проверьте, что после смены роли права по старому токену '
+            'берутся из БД.'
+        )
+
+    def test_04_role_change_revoke(self, client, admin_client, user,
+                                   settings):
+        settings.TOKEN_ROLE_CLAIMS = {'ON_ROLE_CHANGE': 'revoke'}
+        user_client, _ = token_client(client, user)
+        response = user_client.get(self.url_categories)
+        assert response.status_code == HTTPStatus.OK
+        admin_client.patch(
+            f'/api/v1/users/{user.username}/', data={'bio': 'новое'}
+        )
+        response = user_client.get(self.url_categories)
+        assert response.status_code == HTTPStatus.OK
+        admin_client.patch(
+            f'/api/v1/users/{user.username}/', data={'role': 'moderator'}
+        )
+        response = user_client.get(self.url_categories)
+        assert response.status_code == HTTPStatus.UNAUTHORIZED, (
+            'Проверьте, что при ON_ROLE_CHANGE=revoke токен, выданный '
+            'до смены роли, отклоняется.'
+        )
+        user_client, token = token_client(client, user)
+        assert token['role'] == 'moderator'
+        response = user_client.get(self.url_categories)
+        assert response.status_code == HTTPStatus.OK
+
+    def test_05_changes_outside_api(self, client, admin, user):
+        category = Category.objects.create(name='Фильм', slug='film')
+        title = Title.objects.create(name='Название', year=2000,
+                                     category=category)
+        reviews_url = f'/api/v1/titles/{title.id}/reviews/'
+        data = {'name': 'Книга', 'slug': 'book'}
+        admin_client, _ = token_client(client, admin)
+        user_client, _ = token_client(client, user)
+
+        admin.role = 'user'
+        admin.save()
+        response = admin_client.post(self.url_categories, data=data)
+        assert response.status_code == HTTPStatus.FORBIDDEN, (
+            'Проверьте, что понижение роли вне API лишает токен прав.'
+        )
+
+        user.is_active = False
+        user.save()
+        assert user_client.get('/api/v1/users/me/').status_code == (
+            HTTPStatus.UNAUTHORIZED
+        ), 'Проверьте, что токен неактивного пользователя отклоняется.'
+        response = user_client.post(
+            reviews_url, data={'text': 'Текст', 'score': 5}
+        )
+        assert response.status_code == HTTPStatus.UNAUTHORIZED
+
+        admin.delete()
+        response = admin_client.post(
+            reviews_url, data={'text': 'Текст', 'score': 5}
+        )
+        assert response.status_code == HTTPStatus.UNAUTHORIZED, (
+            'Проверьте, что токен удаленного пользователя отклоняется.'
+        )
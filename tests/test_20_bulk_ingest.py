@@ -0,0 +1,95 @@
+import json
+from http import HTTPStatus
+
+import pytest
+
+from reviews.models import Category, Comment, Review, Title
+
+
+@pytest.fixture
+def title():
+    category = Category.objects.create(name='Фильм', slug='film')
+    return Title.objects.create(name='Название', year=2000, category=category)
+
+
+@pytest.mark.django_db(transaction=True)
+class Test20BulkIngest:
+
+    def test_01_reviews(self, admin_client, admin, user, moderator, title,
+                        django_assert_max_num_queries):
+        Review.objects.create(title=title, author=moderator, text='Было',
+                              score=2)
+        url = f'/api/v1/titles/{title.id}/reviews/bulk/'
+        data = [
+            {'author': user.username, 'text': 'Текст', 'score': 10},
+            {'author': moderator.username, 'text': 'Текст', 'score': 5},
+            {'author': 'nobody', 'text': 'Текст', 'score': 5},
+            {'text': 'Текст', 'score': 11},
+            {'text': 'Текст', 'score': 6},
+            {'author': user.username, 'text': 'Текст', 'score': 1},
+        ]
+        with django_assert_max_num_queries(10):
+            response = admin_client.post(url, data=data, format='json')
+        assert response.status_code == HTTPStatus.OK
+        results = response.json()
+        assert [item['status'] for item in results] == [
+            201, 400, 400, 400, 201, 400
+        ], (
+            f'Проверьте, что `{url}` возвращает результат по каждому '
+            'элементу и проверяет уникальность отзыва в БД и внутри пачки.'
+        )
+        assert [item['index'] for item in results] == list(range(6))
+        review = Review.objects.get(pk=results[0]['id'])
+        assert review.author == user and review.score == 10
+        assert Review.objects.get(pk=results[4]['id']).author == admin
+
+        title.refresh_from_db()
+        assert title.rating_count == 3
+        assert title.rating_sum == 18, (
+            'Проверьте, что пакетная загрузка обновляет рейтинг '
+            'произведения.'
+        )
+
+    def test_02_ndjson_comments(self, admin_client, user, title):
+        review = Review.objects.create(title=title, author=user, text='Т',
+                                       score=2)
+        url = f'/api/v1/titles/{title.id}/reviews/{review.id}/comments/bulk/'
+        body = '\n'.join(
+            json.dumps({'author': user.username, 'text': f'Комментарий {n}'})
+            for n in range(3)
+        ) + '\n'
+        response = admin_client.post(
+            url, data=body, content_type='application/x-ndjson'
+        )
+        assert response.status_code == HTTPStatus.OK, (
+            f'Проверьте, что `{url}` принимает NDJSON.'
+        )
+        ids = [item['id'] for item in response.json()]
+        assert [
+            Comment.objects.get(pk=pk).text for pk in ids
+        ] == [f'Комментарий {n}' for n in range(3)]
+
+    def test_03_permissions(self, user_client, client, title):
+        url = f'/api/v1/titles/{title.id}/reviews/bulk/'
+        data = [{'text': 'Текст', 'score': 5}]
+        response = client.post(url, data=data, content_type='application/json')
+        assert response.status_code == HTTPStatus.UNAUTHORIZED
+        response = user_client.post(url, data=data, format='json')
+        assert response.status_code == HTTPStatus.FORBIDDEN, (
+            f'Проверьте, что `{url}` доступен только администратору.'
+        )
+        assert not Review.objects.exists()
+
+    def test_04_invalid_body(self, admin_client, title):
+        url = f'/api/v1/titles/{title.id}/reviews/bulk/'
+        response = admin_client.post(url, data={'text': 'Т'}, format='json')
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+        response = admin_client.post(
+            url, data='{"text": 1}\nне json\n',
+            content_type='application/x-ndjson'
+        )
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+        response = admin_client.post(
+            '/api/v1/titles/999/reviews/bulk/', data=[], format='json'
+        )
+        assert response.status_code == HTTPStatus.NOT_FOUND
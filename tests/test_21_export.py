@@ -0,0 +1,94 @@
+import csv
+import json
+from http import HTTPStatus
+from io import StringIO
+from pathlib import Path
+
+import pytest
+from django.conf import settings
+from django.core.management import call_command
+
+from core.export import CSV_LAYOUT
+from reviews.models import Category, Comment, Genre, Review, Title, TitleGenre
+
+
+@pytest.fixture
+def dataset(user, moderator):
+    category = Category.objects.create(name='Фильм', slug='film')
+    genre = Genre.objects.create(name='Драма', slug='drama')
+    title = Title.objects.create(name='Название, с запятой', year=2000,
+                                 category=category, description='Описание')
+    TitleGenre.objects.create(title=title, genre=genre)
+    review = Review.objects.create(title=title, author=user,
+                                   text='Первая строка\nвторая', score=7)
+    Comment.objects.create(review=review, author=moderator, text='"Цитата"')
+    return title, review
+
+
+def streamed(response):
+    return b''.join(response.streaming_content).decode()
+
+
+@pytest.mark.django_db(transaction=True)
+class Test21Export:
+
+    def test_01_csv(self, admin_client, dataset):
+        title, review = dataset
+        response = admin_client.get('/api/v1/export/review.csv')
+        assert response.status_code == HTTPStatus.OK
+        assert response.streaming, (
+            'Проверьте, что выгрузка отдается потоком.'
+        )
+        rows = list(csv.reader(StringIO(streamed(response))))
+        with open(Path(settings.STATICFILES_DIRS[0], 'data', 'review.csv'),
+                  encoding='utf-8') as h_file:
+            assert rows[0] == next(csv.reader(h_file)), (
+                'Проверьте, что колонки выгрузки совпадают с static/data.'
+            )
+        assert rows[1] == [
+            str(review.id), str(title.id), review.text,
+            str(review.author_id), '7',
+            review.pub_date.isoformat().replace('+00:00', 'Z')
+        ]
+
+    def test_02_ndjson(self, admin_client, dataset):
+        title, _ = dataset
+        response = admin_client.get('/api/v1/export/titles.ndjson')
+        assert response.status_code == HTTPStatus.OK
+        items = [json.loads(line) for line in streamed(response).split('\n')
+                 if line]
+        assert items == [{
+            'id': title.id, 'name': title.name, 'year': 2000,
+            'category': title.category_id, 'description': 'Описание'
+        }]
+
+    def test_03_access(self, client, user_client, admin_client):
+        url = '/api/v1/export/users.csv'
+        assert client.get(url).status_code == HTTPStatus.UNAUTHORIZED
+        assert user_client.get(url).status_code == HTTPStatus.FORBIDDEN, (
+            f'Проверьте, что `{url}` доступен только администратору.'
+        )
+        response = admin_client.get('/api/v1/export/nothing.csv')
+        assert response.status_code == HTTPStatus.NOT_FOUND
+        response = admin_client.get('/api/v1/export/users.xml')
+        assert response.status_code == HTTPStatus.NOT_FOUND
+
+    def test_04_dumpcsv_loadcsv(self, dataset, tmp_path, settings):
+        def table_data():
+            # pub_date при загрузке заполняется auto_now_add
+            return {
+                file: list(model.objects.order_by('pk').values_list(*[
+                    rename.get(column, column) for column in columns
+                    if column != 'pub_date'
+                ]))
+                for file, model, columns, rename in CSV_LAYOUT
+            }
+
+        call_command('dumpcsv', output=tmp_path / 'data', stdout=StringIO())
+        before = table_data()
+        settings.STATICFILES_DIRS = (str(tmp_path),)
+        call_command('loadcsv', state_file=tmp_path / 'state.json')
+        assert table_data() == before, (
+            'Проверьте, что файлы dumpcsv загружаются командой loadcsv '
+            'без потерь.'
+        )
@@ -0,0 +1,76 @@
+from http import HTTPStatus
+
+import pytest
+
+from reviews.models import Title
+from tests.utils import create_reviews
+
+
+def histogram(**counts):
+    return {str(score): counts.get(f's{score}', 0) for score in range(1, 11)}
+
+
+@pytest.mark.django_db(transaction=True)
+class Test22ScoreHistogram:
+    include = '?include=review_count,score_histogram'
+
+    def get_title(self, client, title_id, query=include):
+        response = client.get(f'/api/v1/titles/{title_id}/{query}')
+        assert response.status_code == HTTPStatus.OK
+        return response.json()
+
+    def test_01_optional_fields(self, admin_client, admin, user,
+                                user_client):
+        author_map = {admin: admin_client, user: user_client}
+        _, titles = create_reviews(admin_client, author_map)
+        data = self.get_title(admin_client, titles[0]['id'], '')
+        assert 'score_histogram' not in data and 'review_count' not in data, (
+            'Проверьте, что гистограмма оценок выводится только по запросу.'
+        )
+        data = self.get_title(admin_client, titles[0]['id'])
+        assert data['review_count'] == 2
+        assert data['score_histogram'] == histogram(s5=2)
+
+        response = admin_client.get(f'/api/v1/titles/{self.include}')
+        assert response.status_code == HTTPStatus.OK
+        assert response.json()['results'][0]['score_histogram']
+
+    def test_02_histogram_follows_reviews(self, admin_client, admin, user,
+                                          user_client):
+        author_map = {admin: admin_client, user: user_client}
+        reviews, titles = create_reviews(admin_client, author_map)
+        title_id = titles[0]['id']
+        url = f'/api/v1/titles/{title_id}/reviews/'
+
+        user_client.patch(f'{url}{reviews[1]["id"]}/', data={'score': 9})
+        data = self.get_title(admin_client, title_id)
+        assert data['score_histogram'] == histogram(s5=1, s9=1), (
+            'Проверьте, что гистограмма оценок учитывает изменение оценки.'
+        )
+        admin_client.delete(f'{url}{reviews[0]["id"]}/')
+        data = self.get_title(admin_client, title_id)
+        assert data['score_histogram'] == histogram(s9=1)
+        assert data['review_count'] == 1
+
+        response = admin_client.post(f'{url}bulk/', data=[
+            {'author': admin.username, 'text': 'Текст', 'score': 9}
+        ], format='json')
+        assert response.status_code == HTTPStatus.OK
+        data = self.get_title(admin_client, title_id)
+        assert data['score_histogram'] == histogram(s9=2), (
+            'Проверьте, что пакетная загрузка обновляет гистограмму оценок.'
+        )
+
+    def test_03_rebuild(self, admin_client, admin, user, user_client):
+        author_map = {admin: admin_client, user: user_client}
+        _, titles = create_reviews(admin_client, author_map)
+        Title.objects.update(score_5=0, rating_count=0)
+
+        Title.objects.rebuild_rating()
+        title = Title.objects.get(pk=titles[0]['id'])
+        assert title.score_histogram == {
+            score: 2 if score == 5 else 0 for score in range(1, 11)
+        }, 'Проверьте, что `rebuild_rating` пересчитывает гистограмму.'
+        assert title.rating_count == 2
+        title = Title.objects.get(pk=titles[1]['id'])
+        assert sum(title.score_histogram.values()) == 0
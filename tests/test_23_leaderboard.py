@@ -0,0 +1,124 @@
+from datetime import timedelta
+from http import HTTPStatus
+
+import pytest
+from django.utils import timezone
+
+from reviews.models import (Category, Genre, Review, Title, TitleGenre,
+                            TrendingEpoch)
+
+
+@pytest.fixture
+def titles(django_user_model):
+    users = [
+        django_user_model.objects.create_user(
+            username=f'reader{number}', email=f'reader{number}@yamdb.fake'
+        )
+        for number in range(6)
+    ]
+    film = Category.objects.create(name='Фильм', slug='film')
+    book = Category.objects.create(name='Книга', slug='book')
+    drama = Genre.objects.create(name='Драма', slug='drama')
+    titles = {
+        'one_ten': Title.objects.create(name='A', year=2000, category=film),
+        'many_nines': Title.objects.create(name='B', year=2000,
+                                           category=film),
+        'book': Title.objects.create(name='C', year=2000, category=book),
+        'empty': Title.objects.create(name='D', year=2000, category=book),
+    }
+    TitleGenre.objects.create(title=titles['book'], genre=drama)
+    Review.objects.create(title=titles['one_ten'], author=users[0],
+                          text='Т', score=10)
+    for user in users:
+        Review.objects.create(title=titles['many_nines'], author=user,
+                              text='Т', score=9)
+    for user in users[:3]:
+        Review.objects.create(title=titles['book'], author=user,
+                              text='Т', score=8)
+    return titles
+
+
+def names(response):
+    assert response.status_code == HTTPStatus.OK
+    return [title['name'] for title in response.json()]
+
+
+@pytest.mark.django_db(transaction=True)
+class Test23Leaderboard:
+    url_top = '/api/v1/titles/top/'
+    url_trending = '/api/v1/titles/trending/'
+
+    def test_01_top(self, client, titles):
+        assert names(client.get(self.url_top)) == ['B', 'C', 'A'], (
+            f'Проверьте, что `{self.url_top}` сортирует произведения по '
+            'сглаженному рейтингу и не выводит произведения без отзывов.'
+        )
+        assert names(client.get(f'{self.url_top}?category=film')) == [
+            'B', 'A'
+        ]
+        assert names(client.get(f'{self.url_top}?genre=drama')) == ['C']
+
+    def test_02_top_follows_reviews(self, client, titles,
+                                    django_assert_num_queries):
+        client.get(self.url_top)
+        with django_assert_num_queries(0):
+            response = client.get(self.url_top)
+        assert response.status_code == HTTPStatus.OK, (
+            f'Проверьте, что `{self.url_top}` отдается из кеша.'
+        )
+        titles['many_nines'].reviews.update(score=1)
+        Title.objects.rebuild_rating()
+        Review.objects.filter(title=titles['one_ten']).get().delete()
+        assert names(client.get(self.url_top)) == ['C', 'B'], (
+            'Проверьте, что рейтинг лидеров обновляется при изменении '
+            'отзывов.'
+        )
+
+    def test_03_trending(self, client, titles):
+        old = timezone.now() - timedelta(days=60)
+        titles['many_nines'].reviews.update(pub_date=old)
+        Title.objects.rebuild_trending()
+        assert names(client.get(self.url_trending)) == ['C', 'A', 'B'], (
+            f'Проверьте, что `{self.url_trending}` учитывает давность '
+            'отзывов.'
+        )
+
+    def test_04_incremental_trending(self, titles):
+        stored = dict(Title.objects.values_list('pk', 'trending'))
+        Title.objects.update(trending=0)
+        Title.objects.rebuild_trending()
+        for pk, trending in Title.objects.values_list('pk', 'trending'):
+            assert trending == pytest.approx(stored[pk]), (
+                'Проверьте, что популярность, накопленная сигналами, '
+                'совпадает с пересчитанной.'
+            )
+
+    def test_05_short_half_life(self, client, settings, user_client,
+                                titles):
+        settings.LEADERBOARD = {'TRENDING_HALF_LIFE': 60}
+        TrendingEpoch.objects.update(
+            moment=timezone.now() - timedelta(days=2000)
+        )
+        response = user_client.post(
+            f'/api/v1/titles/{titles["empty"].id}/reviews/',
+            data={'text': 'Т', 'score': 7}
+        )
+        assert response.status_code == HTTPStatus.CREATED, (
+            'Проверьте, что вес популярности не переполняется при '
+            'коротком периоде полураспада и давней эпохе.'
+        )
+        Title.objects.rebuild_trending(rebase=True)
+        assert TrendingEpoch.current() > timezone.now() - timedelta(
+            minutes=1
+        ), 'Проверьте, что rebuild_trending(rebase=True) переносит эпоху.'
+        assert 'D' in names(client.get(self.url_trending))
+
+    def test_06_deleted_reviews_leave_no_trending(self, client, titles):
+        for review in titles['many_nines'].reviews.all():
+            review.delete()
+        titles['many_nines'].refresh_from_db()
+        assert titles['many_nines'].trending == 0, (
+            'Проверьте, что после удаления всех отзывов популярность '
+            'произведения обнуляется.'
+        )
+        assert 'B' not in names(client.get(self.url_trending))
@@ -0,0 +1,53 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+from reviews.models import Category, Comment, Genre, Review, Title
+from users.models import User
+
+OPTIONS = {
+    'users': 50, 'categories': 2, 'genres': 5, 'titles': 20,
+    'reviews': 300, 'comments': 100, 'seed': 7,
+}
+
+
+def seed(**options):
+    call_command('seed_bench', stdout=StringIO(), **{**OPTIONS, **options})
+    return (
+        list(Title.objects.order_by('pk').values_list(
+            'name', 'category_id', 'rating_count', 'rating'
+        )),
+        list(Review.objects.order_by('pk').values_list(
+            'title_id', 'author_id', 'score', 'pub_date'
+        )),
+        list(Comment.objects.order_by('pk').values_list(
+            'review_id', 'pub_date'
+        )),
+    )
+
+
+@pytest.mark.django_db(transaction=True)
+class Test24SeedBench:
+
+    def test_01_counts_and_skew(self):
+        titles, reviews, comments = seed()
+        assert len(titles) == 20 and len(comments) == 100
+        counts = sorted((title[2] for title in titles), reverse=True)
+        assert sum(counts) == len(reviews)
+        assert counts[0] == 50 and counts[-1] < 10, (
+            'Проверьте, что отзывы распределяются по произведениям '
+            'неравномерно и не больше одного на автора.'
+        )
+
+    def test_02_deterministic(self):
+        first = seed()
+        for model in (User, Category, Genre, Title):
+            model.objects.all().delete()
+        assert seed() == first, (
+            'Проверьте, что seed_bench с тем же зерном генерирует '
+            'те же данные.'
+        )
+        for model in (User, Category, Genre, Title):
+            model.objects.all().delete()
+        assert seed(seed=8) != first
@@ -0,0 +1,78 @@
+import json
+import logging
+import re
+
+import pytest
+from django.db import connection
+from rest_framework.test import APIClient
+
+from core.middleware import QueryProfile
+from reviews.models import Category, Title
+
+
+@pytest.fixture
+def profile_on(settings):
+    settings.QUERY_PROFILE = {'ENABLED': True, 'SAMPLE_RATE': 1}
+    return settings
+
+
+@pytest.fixture
+def titles():
+    category = Category.objects.create(name='Фильм', slug='film')
+    return [
+        Title.objects.create(name=f'Название {n}', year=2000,
+                             category=category)
+        for n in range(3)
+    ]
+
+
+@pytest.mark.django_db(transaction=True)
+class Test25QueryProfile:
+    url = '/api/v1/titles/'
+
+    def test_01_disabled(self, titles):
+        response = APIClient().get(self.url)
+        assert not response.has_header('Server-Timing'), (
+            'Проверьте, что профилирование выключено по умолчанию.'
+        )
+
+    def test_02_server_timing(self, profile_on, titles, caplog):
+        logger = logging.getLogger('core.profile')
+        logger.addHandler(caplog.handler)
+        try:
+            response = APIClient().get(self.url)
+        finally:
+            logger.removeHandler(caplog.handler)
+        header = response.get('Server-Timing', '')
+        match = re.search(r'sql;dur=[\d.]+;desc="(\d+) queries', header)
+        assert match, (
+            'Проверьте, что ответ содержит заголовок Server-Timing '
+            'со временем и количеством SQL запросов.'
+        )
+        assert int(match.group(1)) == 3
+        assert re.search(r'serializer;dur=[\d.]+', header)
+        assert re.search(r'total;dur=[\d.]+', header)
+
+        record = json.loads(caplog.records[-1].getMessage())
+        assert record['route'] == 'api/v1/titles/$'
+        assert record['queries'] == 3
+        assert record['status'] == 200
+        assert record['serializer_ms'] > 0
+
+    def test_03_sampling(self, profile_on, titles):
+        profile_on.QUERY_PROFILE = {'ENABLED': True, 'SAMPLE_RATE': 0}
+        response = APIClient().get(self.url)
+        assert not response.has_header('Server-Timing'), (
+            'Проверьте, что профилируется только доля SAMPLE_RATE запросов.'
+        )
+
+    def test_04_duplicates(self, titles):
+        profile = QueryProfile()
+        with connection.execute_wrapper(profile):
+            for title in titles:
+                Title.objects.get(pk=title.pk)
+            Category.objects.count()
+        assert profile.queries == 4
+        assert list(profile.duplicates().values()) == [3], (
+            'Проверьте, что повторяющиеся запросы (N+1) выявляются.'
+        )
@@ -0,0 +1,115 @@
+import json
+import os
+import re
+
+import pytest
+from rest_framework.test import APIClient
+
+from core.metrics import collector
+from reviews.models import Category
+
+
+@pytest.fixture
+def metrics(settings):
+    settings.METRICS = {'ENABLED': True}
+    collector.reset()
+    yield collector
+    collector.reset()
+
+
+def sample(text, name, **labels):
+    """Значение метрики с заданными метками или None."""
+    for line in text.splitlines():
+        match = re.fullmatch(r'(\w+)\{(.*)\} (\S+)', line)
+        if not match or match.group(1) != name:
+            continue
+        found = dict(re.findall(r'(\w+)="([^"]*)"', match.group(2)))
+        if all(found.get(key) == str(value) for key, value in labels.items()):
+            return float(match.group(3))
+    return None
+
+
+@pytest.mark.django_db(transaction=True)
+class Test26Metrics:
+    url = '/api/v1/metrics/'
+
+    def test_01_permissions(self, metrics, client, user_client,
+                            admin_client):
+        assert client.get(self.url).status_code == 401, (
+            'Проверьте, что метрики недоступны без токена.'
+        )
+        assert user_client.get(self.url).status_code == 403, (
+            'Проверьте, что метрики доступны только администратору.'
+        )
+        response = admin_client.get(self.url)
+        assert response.status_code == 200
+        assert response['Content-Type'].startswith('text/plain')
+
+    def test_02_requests(self, metrics, admin_client):
+        Category.objects.create(name='Фильм', slug='film')
+        client = APIClient()
+        for _ in range(3):
+            client.get('/api/v1/categories/')
+        client.get('/api/v1/titles/1/')
+        client.get('/api/v1/nowhere/')
+        text = admin_client.get(self.url).content.decode()
+
+        assert sample(
+            text, 'yamdb_http_requests_total',
+            route='categories-list', method='GET', status=200
+        ) == 3, (
+            'Проверьте, что запросы считаются по маршруту, методу и статусу.'
+        )
+        assert sample(
+            text, 'yamdb_http_requests_total',
+            route='titles-detail', method='GET', status=404
+        ) == 1
+        assert sample(
+            text, 'yamdb_http_requests_total', route='unmatched', status=404
+        ) == 1
+        assert sample(
+            text, 'yamdb_http_request_duration_seconds_bucket',
+            route='categories-list', le='+Inf'
+        ) == 3, 'Проверьте гистограмму длительности запросов.'
+        assert sample(
+            text, 'yamdb_http_request_duration_seconds_count',
+            route='categories-list'
+        ) == 3
+        assert sample(
+            text, 'yamdb_http_requests_in_flight', route='metrics'
+        ) == 1, 'Проверьте, что учитываются запросы в обработке.'
+        assert sample(
+            text, 'yamdb_http_requests_in_flight', route='categories-list'
+        ) == 0
+        assert 'yamdb_outbox_pending 0' in text
+
+    def test_03_multiprocess(self, metrics, settings, admin_client,
+                             tmp_path):
+        settings.METRICS = {'ENABLED': True, 'MULTIPROCESS_DIR': tmp_path}
+        # файл завершившегося процесса
+        with open(tmp_path / '999999999.json', 'w') as h_file:
+            json.dump({
+                'pid': 999999999,
+                'requests': [['genres-list', 'GET', '200', 5]],
+                'durations': [['genres-list', 'GET', [5] + [0] * 11 + [0.1]]],
+                'in_flight': [['genres-list', 2]],
+            }, h_file)
+        client = APIClient()
+        client.get('/api/v1/genres/')
+        text = admin_client.get(self.url).content.decode()
+
+        assert sample(
+            text, 'yamdb_http_requests_total',
+            route='genres-list', status=200
+        ) == 6, 'Проверьте сложение метрик всех процессов.'
+        assert sample(
+            text, 'yamdb_http_request_duration_seconds_count',
+            route='genres-list'
+        ) == 6
+        assert sample(
+            text, 'yamdb_http_requests_in_flight', route='genres-list'
+        ) == 0, (
+            'Проверьте, что запросы в обработке завершившихся процессов '
+            'не учитываются.'
+        )
+        assert (tmp_path / f'{os.getpid()}.json').exists()
@@ -0,0 +1,135 @@
+import asyncio
+import importlib
+import re
+import threading
+from http import HTTPStatus
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.test import AsyncClient
+from django.urls import clear_url_caches, resolve
+
+import api.urls
+import api_yamdb.urls
+from api.views import TitleViewSet
+from reviews.models import Comment, Review, Title
+
+
+def reload_urls():
+    importlib.reload(api.urls)
+    importlib.reload(api_yamdb.urls)
+    clear_url_caches()
+
+
+@pytest.fixture
+def async_read(settings):
+    settings.ASYNC_READ = {'ENABLED': True, 'THREADS': 2}
+    reload_urls()
+    yield
+    settings.ASYNC_READ = {'ENABLED': False}
+    reload_urls()
+
+
+@pytest.fixture
+def review(user):
+    title = Title.objects.create(name='Терминатор', year=1984)
+    review = Review.objects.create(
+        title=title, author=user, text='text', score=5
+    )
+    Comment.objects.create(review=review, author=user, text='comment')
+    return review
+
+
+@async_to_sync
+async def get(url, **headers):
+    return await AsyncClient().get(url, **headers)
+
+
+@async_to_sync
+async def post(url, data, **headers):
+    return await AsyncClient().post(
+        url, data, content_type='application/json', **headers
+    )
+
+
+@pytest.mark.django_db(transaction=True)
+class Test27AsyncRead:
+
+    def test_01_sync_by_default(self):
+        view = TitleViewSet.as_view({'get': 'list'})
+        assert not asyncio.iscoroutinefunction(view), (
+            'Проверьте, что без ASYNC_READ представления синхронные.'
+        )
+
+    def test_02_async_views(self, async_read, review):
+        title_id = review.title_id
+        urls = (
+            '/api/v1/titles/',
+            f'/api/v1/titles/{title_id}/',
+            f'/api/v1/titles/{title_id}/reviews/',
+            f'/api/v1/titles/{title_id}/reviews/{review.id}/',
+            f'/api/v1/titles/{title_id}/reviews/{review.id}/comments/',
+        )
+        for url in urls:
+            assert asyncio.iscoroutinefunction(resolve(url).func), (
+                f'Проверьте, что `{url}` обслуживается асинхронно.'
+            )
+            response = get(url)
+            assert response.status_code == HTTPStatus.OK, (
+                f'Проверьте, что GET-запрос к `{url}` под ASGI '
+                'возвращает 200.'
+            )
+        assert get('/api/v1/titles/').json()['results'][0]['id'] == title_id
+        response = get(f'/api/v1/titles/{title_id}/reviews/')
+        assert response.json()['results'][0]['text'] == 'text'
+        assert get(f'/api/v1/titles/{title_id + 1}/').status_code == 404
+
+    def test_03_read_pool(self, async_read, review, monkeypatch):
+        threads = set()
+        list_titles = TitleViewSet.list
+
+        def list_in_thread(self, request, *args, **kwargs):
+            threads.add(threading.current_thread().name)
+            return list_titles(self, request, *args, **kwargs)
+
+        monkeypatch.setattr(TitleViewSet, 'list', list_in_thread)
+        response = get('/api/v1/titles/')
+        assert response.status_code == HTTPStatus.OK
+        assert [name.split('_')[0] for name in threads] == ['read'], (
+            'Проверьте, что чтение выполняется в пуле потоков чтения.'
+        )
+        etag = response['ETag']
+        assert get(
+            '/api/v1/titles/', if_none_match=etag
+        ).status_code == HTTPStatus.NOT_MODIFIED
+
+    def test_04_sync_write(self, async_read, review, token_admin):
+        url = f'/api/v1/titles/{review.title_id}/reviews/'
+        response = post(
+            url, {'text': 'Отзыв', 'score': 7},
+            authorization=f'Bearer {token_admin["access"]}'
+        )
+        assert response.status_code == HTTPStatus.CREATED, (
+            'Проверьте, что запись под ASGI работает как раньше.'
+        )
+        assert get(url).json()['count'] == 2
+
+    def test_05_query_profile(self, settings, client, review):
+        settings.QUERY_PROFILE = {
+            'ENABLED': True, 'SAMPLE_RATE': 1, 'LOG': False
+        }
+        url = '/api/v1/titles/'
+        expected = re.search(
+            r'(\d+) queries', client.get(url)['Server-Timing']
+        ).group(1)
+        settings.ASYNC_READ = {'ENABLED': True, 'THREADS': 2}
+        reload_urls()
+        try:
+            header = get(url)['Server-Timing']
+        finally:
+            settings.ASYNC_READ = {'ENABLED': False}
+            reload_urls()
+        assert f'desc="{expected} queries' in header, (
+            'Проверьте, что профилирование учитывает запросы, '
+            'выполненные в пуле потоков чтения.'
+        )
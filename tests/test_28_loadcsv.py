@@ -0,0 +1,257 @@
+import csv
+import json
+import re
+
+import pytest
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from core.management.commands.loadcsv import (Command, foreign_keys,
+                                              load_stages)
+from reviews.models import Category, Comment, Genre, Review, Title
+from users.models import User
+
+
+@pytest.fixture
+def data_dir(tmp_path, settings):
+    settings.STATICFILES_DIRS = (str(tmp_path),)
+    (tmp_path / 'data').mkdir()
+    return tmp_path / 'data'
+
+
+def write_csv(data_dir, name, rows):
+    with open(data_dir / name, 'w', encoding='utf-8', newline='') as h_file:
+        csv.writer(h_file).writerows(rows)
+
+
+def loadcsv(data_dir, capsys, **options):
+    call_command(
+        'loadcsv', state_file=data_dir.parent / 'state.json', **options
+    )
+    return capsys.readouterr().out
+
+
+CATEGORIES = [['id', 'name', 'slug'], [1, 'Фильм', 'movie'],
+              [2, 'Книга', 'book']]
+
+
+@pytest.mark.django_db(transaction=True)
+class Test28LoadCSV:
+
+    def test_01_dangling_foreign_key(self, data_dir, capsys):
+        write_csv(data_dir, 'category.csv', CATEGORIES)
+        write_csv(data_dir, 'titles.csv', [
+            ['id', 'name', 'year', 'category'],
+            [1, 'Побег из Шоушенка', 1994, 1],
+            [2, 'Крестный отец', 1972, 99],
+        ])
+        output = loadcsv(data_dir, capsys)
+        assert 'строка 3: Category с id=99 не найден' in output, (
+            'Проверьте, что ссылка на несуществующую запись сообщает '
+            'строку файла и id.'
+        )
+        assert not Title.objects.exists(), (
+            'Проверьте, что файл с ошибкой не загружается частично.'
+        )
+        assert Category.objects.count() == 2
+
+    def test_02_rows_per_second(self, data_dir, capsys):
+        write_csv(data_dir, 'category.csv', CATEGORIES)
+        output = loadcsv(data_dir, capsys)
+        assert re.search(
+            r'category\.csv - .*OK .*2 строк, записано 2, \d+ строк/с',
+            output
+        ), 'Проверьте отчет о загрузке: строки, записи и скорость.'
+
+    def test_03_batches(self, data_dir, capsys):
+        write_csv(data_dir, 'category.csv', [['id', 'name', 'slug']] + [
+            [pk, f'Категория {pk}', f'slug{pk}'] for pk in range(1, 6)
+        ])
+        with CaptureQueriesContext(connection) as context:
+            loadcsv(data_dir, capsys, batch_size=2)
+        inserts = [
+            query for query in context.captured_queries
+            if query['sql'].startswith('INSERT INTO "reviews_category"')
+        ]
+        assert len(inserts) == 3, (
+            'Проверьте, что строки вставляются пачками по --batch-size.'
+        )
+        assert Category.objects.count() == 5
+
+    def test_04_bad_row(self, data_dir, capsys):
+        Category.objects.create(name='Старая', slug='old')
+        write_csv(data_dir, 'category.csv', CATEGORIES)
+        write_csv(data_dir, 'titles.csv', [
+            ['id', 'name', 'year', 'category'],
+            [1, 'Побег из Шоушенка', 1994, 1],
+            [2, 'Крестный отец', 'год', 1],
+        ])
+        output = loadcsv(data_dir, capsys, batch_size=1)
+        assert re.search(r'titles\.csv - .*NO .*строка 3: ', output), (
+            'Проверьте, что ошибка сообщает номер строки файла.'
+        )
+        assert not Title.objects.exists(), (
+            'Проверьте, что загрузка файла с ошибкой откатывается целиком.'
+        )
+        assert Category.objects.count() == 2
+
+        Category.objects.all().delete()
+        Category.objects.create(name='Старая', slug='old')
+        with pytest.raises(CommandError):
+            loadcsv(data_dir, capsys, atomic='run')
+        assert list(Category.objects.values_list('slug', flat=True)) == [
+            'old'
+        ], 'Проверьте, что --atomic run откатывает все файлы.'
+
+    def test_05_replace_cascade(self, data_dir, capsys, user, admin):
+        title = Title.objects.create(name='Терминатор', year=1984)
+        for author in (user, admin):
+            review = Review.objects.create(
+                title=title, author=author, text='text', score=4
+            )
+            Comment.objects.create(review=review, author=author, text='text')
+        write_csv(data_dir, 'users.csv', [
+            ['id', 'username', 'email', 'role', 'bio', 'first_name',
+             'last_name'],
+            [100, 'bingobongo', 'bingobongo@yamdb.fake', 'user', '', '', ''],
+        ])
+        with CaptureQueriesContext(connection) as context:
+            loadcsv(data_dir, capsys)
+        assert not any(
+            query['sql'].startswith('SELECT "reviews_review"."id"')
+            for query in context.captured_queries
+        ), 'Проверьте, что при очистке таблиц записи не загружаются.'
+        assert not Review.objects.exists() and not Comment.objects.exists()
+        title.refresh_from_db()
+        assert (title.rating_count, title.rating_sum) == (0, 0), (
+            'Проверьте, что рейтинг пересчитывается после очистки отзывов.'
+        )
+
+    def test_06_load_stages(self):
+        stages = load_stages(Command.link_models)
+        position = {
+            model: number
+            for number, stage in enumerate(stages)
+            for _, model, _ in stage
+        }
+        for file, model, _ in Command.link_models:
+            for field in foreign_keys(model):
+                if field.related_model in position:
+                    assert (
+                        position[field.related_model] < position[model]
+                    ), (
+                        f'Проверьте, что {file} загружается после файла '
+                        f'модели {field.related_model.__name__}.'
+                    )
+        assert {file for file, _, _ in stages[0]} == {
+            'users.csv', 'category.csv', 'genre.csv'
+        }
+
+    def test_07_parallel_stage(self, monkeypatch):
+        calls = {}
+
+        def record(name):
+            def load(self, path, *args):
+                calls[path] = name
+                return path
+            return load
+
+        monkeypatch.setattr(Command, 'try_load', record('serial'))
+        monkeypatch.setattr(
+            Command, 'try_load_in_thread', record('parallel')
+        )
+        stage = {
+            model: (file, model, columns, 10, 'replace')
+            for file, model, columns in load_stages(Command.link_models)[0]
+        }
+        tasks = [stage[Category], stage[User], stage[Genre]]
+        assert Command().run_stage(tasks, workers=3) == [
+            'category.csv', 'users.csv', 'genre.csv'
+        ]
+        assert set(calls.values()) == {'serial'}, (
+            'Проверьте, что файлы, меняющие общие таблицы, '
+            'загружаются по очереди: очистка category.csv и users.csv '
+            'меняет произведения.'
+        )
+        calls.clear()
+        tasks[0] = tasks[0][:-1] + ('upsert',)
+        Command().run_stage(tasks, workers=3)
+        assert set(calls.values()) == {'parallel'}, (
+            'Проверьте, что независимые файлы загружаются параллельно.'
+        )
+
+    def test_08_upsert(self, data_dir, capsys):
+        Category.objects.create(id=1, name='Кино', slug='movie')
+        Category.objects.create(id=3, name='Музыка', slug='music')
+        write_csv(data_dir, 'category.csv', CATEGORIES)
+        output = loadcsv(data_dir, capsys, mode='upsert')
+        assert '2 строк, записано 2,' in output
+        assert dict(Category.objects.values_list('id', 'name')) == {
+            1: 'Фильм', 2: 'Книга', 3: 'Музыка'
+        }, (
+            'Проверьте, что --mode upsert добавляет новые записи, '
+            'обновляет существующие по id и не удаляет остальные.'
+        )
+        with CaptureQueriesContext(connection) as context:
+            output = loadcsv(data_dir, capsys, mode='upsert')
+        assert '2 строк, записано 0,' in output
+        assert not any(
+            query['sql'].startswith(('UPDATE "reviews_category"',
+                                     'INSERT INTO "reviews_category"'))
+            for query in context.captured_queries
+        ), 'Проверьте, что неизмененные строки не перезаписываются.'
+
+    def test_09_skip_unchanged(self, data_dir, capsys):
+        write_csv(data_dir, 'category.csv', CATEGORIES)
+        write_csv(data_dir, 'titles.csv', [
+            ['id', 'name', 'year', 'category'],
+            [1, 'Побег из Шоушенка', 'год', 1],
+        ])
+        loadcsv(data_dir, capsys, mode='upsert', skip_unchanged=True)
+        state = json.loads((data_dir.parent / 'state.json').read_text())
+        assert set(state) == {'category.csv'}, (
+            'Проверьте, что контрольная сумма файла с ошибкой '
+            'не сохраняется.'
+        )
+
+        Category.objects.filter(pk=1).update(name='Изменено')
+        output = loadcsv(data_dir, capsys, mode='upsert',
+                         skip_unchanged=True)
+        assert 'category.csv - без изменений' in output, (
+            'Проверьте, что файл с прежней контрольной суммой пропускается.'
+        )
+        assert Category.objects.get(pk=1).name == 'Изменено'
+        assert re.search(r'titles\.csv - .*NO', output), (
+            'Проверьте, что файл с ошибкой загружается повторно.'
+        )
+
+        write_csv(data_dir, 'category.csv', CATEGORIES[:2])
+        output = loadcsv(data_dir, capsys, mode='upsert',
+                         skip_unchanged=True)
+        assert 'category.csv - без изменений' not in output
+        assert Category.objects.get(pk=1).name == 'Фильм'
+
+    def test_10_upsert_keeps_dates(self, data_dir, capsys):
+        write_csv(data_dir, 'category.csv', CATEGORIES)
+        write_csv(data_dir, 'titles.csv', [
+            ['id', 'name', 'year', 'category'],
+            [1, 'Побег из Шоушенка', 1994, 1],
+        ])
+        write_csv(data_dir, 'users.csv', [
+            ['id', 'username', 'email', 'role', 'bio', 'first_name',
+             'last_name'],
+            [100, 'bingobongo', 'bingobongo@yamdb.fake', 'user', '', '', ''],
+        ])
+        write_csv(data_dir, 'review.csv', [
+            ['id', 'title_id', 'text', 'author', 'score', 'pub_date'],
+            [1, 1, 'Отзыв', 100, 10, '2019-09-24T21:08:21.567Z'],
+        ])
+        loadcsv(data_dir, capsys, mode='upsert')
+        assert Review.objects.get().pub_date.year == 2019, (
+            'Проверьте, что новые записи сохраняют дату из файла.'
+        )
+        output = loadcsv(data_dir, capsys, mode='upsert')
+        assert re.search(r'review\.csv.*1 строк, записано 0,', output), (
+            'Проверьте, что повторная загрузка отзывов ничего не меняет.'
+        )